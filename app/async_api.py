@@ -0,0 +1,231 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from datetime import timedelta
+from typing import Optional
+from . import schemas, crud, crud_async, auth, negotiation, passwords
+from .deps import get_async_db
+
+# Async mirror of the endpoints in main.py, served under /async so the two
+# database paths can be benchmarked against each other on the same app.
+router = APIRouter(prefix="/async", tags=["async"], route_class=negotiation.MsgpackRoute)
+
+
+def _check_pagination(skip: int, limit: int):
+    if skip < 0:
+        raise HTTPException(status_code=400, detail="Skip must be non-negative!")
+    if limit <= 0 or limit > 100:
+        raise HTTPException(
+            status_code=400, detail="Limit must be between 1 and 100 (inclusive)!"
+        )
+
+
+@router.post("/users/", response_model=schemas.User)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Creates a new user.
+
+    Returns:
+        User: The created user object.
+    """
+    db_user = await crud_async.get_user_by_username(db, username=user.username)
+    if db_user:
+        raise HTTPException(status_code=400, detail="Username already registered!")
+    hashed_password = await passwords.hash_password(user.password)
+    return await crud_async.create_user(db, user=user, hashed_password=hashed_password)
+
+
+async def _purge_user(bind: AsyncEngine, user_id: int):
+    async with AsyncSession(bind=bind) as db:
+        await crud_async.purge_user(db, user_id)
+
+
+@router.delete("/users/me", response_model=None)
+async def delete_user(
+    background_tasks: BackgroundTasks,
+    token: str = Depends(auth.oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Deletes the authenticated user's account.
+
+    Accounts with more than `USER_PURGE_THRESHOLD` tasks are locked at once
+    and purged in batches after the response, which is then 202 Accepted.
+
+    Returns:
+        None
+    """
+    user_id = auth.decode_access_token(token).get("user_id")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Couldn't validate credentials!",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if await crud_async.count_tasks(db, user_id=user_id) > crud.USER_PURGE_THRESHOLD:
+        await crud_async.deactivate_user(db, user_id=user_id)
+        background_tasks.add_task(_purge_user, db.bind, user_id)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+    await crud_async.delete_user(db, user_id=user_id)
+    return None
+
+
+@router.post("/token", response_model=schemas.Token)
+async def login_for_access_token(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Authenticates a user and returns a JWT token.
+
+    Returns:
+        dict: JWT access token and token type.
+    """
+    user = await crud_async.get_user_by_username(db, form_data.username)
+    if not user or not await passwords.verify_password(form_data.password, user.password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password!",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    access_token = auth.create_access_token(
+        data={"sub": user.username, "user_id": user.id},
+        expires_delta=timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES),
+        user=user,
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.post("/tasks/", response_model=schemas.Task)
+async def create_task(
+    task: schemas.TaskCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(auth.get_current_user_async),
+):
+    """Creates a new task for the authenticated user.
+
+    Returns:
+        Task: The created task object.
+    """
+    return await crud_async.create_task(db, task=task, user_id=current_user.id)
+
+
+@router.get("/tasks/", response_model=schemas.PaginatedTasks)
+async def read_tasks(
+    skip: int = 0,
+    limit: int = 10,
+    status: Optional[schemas.TaskStatus] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Retrieves a paginated list of tasks with optional status filter.
+
+    Returns:
+        dict: Paginated tasks and metadata.
+    """
+    _check_pagination(skip, limit)
+    tasks, total, has_more = await crud_async.get_tasks(
+        db, skip=skip, limit=limit, status=status
+    )
+    if skip > 0 and skip >= total:
+        raise HTTPException(
+            status_code=400, detail=f"Skip value {skip} exceeds total tasks {total}"
+        )
+    return {
+        "items": tasks,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "has_more": has_more,
+    }
+
+
+@router.get("/tasks/user/", response_model=schemas.PaginatedTasks)
+async def read_user_tasks(
+    skip: int = 0,
+    limit: int = 10,
+    current_user: schemas.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Retrieves a paginated list of tasks for the authenticated user.
+
+    Returns:
+        dict: Paginated user tasks and metadata.
+    """
+    _check_pagination(skip, limit)
+    tasks, total, has_more = await crud_async.get_user_tasks(
+        db, user_id=current_user.id, skip=skip, limit=limit
+    )
+    if skip > 0 and skip >= total:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Skip value {skip} exceeds total user tasks {total}",
+        )
+    return {
+        "items": tasks,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "has_more": has_more,
+    }
+
+
+@router.get("/tasks/{task_id}", response_model=schemas.Task)
+async def read_task(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Retrieves a task by its ID.
+
+    Returns:
+        Task: The task object.
+    """
+    db_task = await crud_async.get_task(db, task_id=task_id)
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found!")
+    return db_task
+
+
+@router.put("/tasks/{task_id}", response_model=schemas.Task)
+async def update_task(
+    task_id: int,
+    task: schemas.TaskUpdate,
+    current_user: schemas.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Updates a task for the authenticated user.
+
+    Returns:
+        Task: The updated task object.
+    """
+    if task.title and (len(task.title.strip()) == 0 or len(task.title) > 100):
+        raise HTTPException(
+            status_code=422, detail="Title must be between 1 and 100 characters!"
+        )
+    if task.description and len(task.description) > 500:
+        raise HTTPException(
+            status_code=422, detail="Description cannot exceed 500 characters!"
+        )
+    return await crud_async.update_task(db, task_id=task_id, task=task, user_id=current_user.id)
+
+
+@router.patch("/tasks/{task_id}/complete", response_model=schemas.Task)
+async def complete_task(
+    task_id: int,
+    current_user: schemas.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Marks a task as completed for the authenticated user.
+
+    Returns:
+        Task: The updated task object.
+    """
+    return await crud_async.complete_task(db, task_id=task_id, user_id=current_user.id)
+
+
+@router.delete("/tasks/{task_id}", response_model=None)
+async def delete_task(
+    task_id: int,
+    current_user: schemas.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Deletes a task for the authenticated user.
+
+    Returns:
+        None
+    """
+    await crud_async.delete_task(db, task_id=task_id, user_id=current_user.id)
+    return None
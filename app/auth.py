@@ -3,18 +3,25 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError, ExpiredSignatureError
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
-from app import crud, schemas
-from app.deps import get_db
+from starlette.concurrency import run_in_threadpool
+from app import crud, crud_async, schemas, passwords
+from app.cache import TTLCache
+from app.deps import get_db, get_async_db
 from dotenv import load_dotenv
 import os
+import threading
+import time
 
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+AUTH_STATELESS = os.getenv("AUTH_STATELESS", "false").lower() == "true"
 
 if not all([SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES]):
     raise ValueError(
@@ -23,17 +30,34 @@ if not all([SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES]):
         "SECRET_KEY, JWT_ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES."
     )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = passwords.pwd_context
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# token -> schemas.User; entries never outlive the token's own expiry
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+# user_id -> (lowest token version still accepted, time.time() the entry can be dropped)
+_revoked_versions = {}
+_revoked_versions_lock = threading.Lock()
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, user=None):
     """Creates a JWT access token for a user.
 
+    In stateless mode the user's profile and token version are embedded as
+    claims so `get_current_user` can skip the database.
+
     Returns:
         str: The encoded JWT token.
     """
     to_encode = data.copy()
+    if AUTH_STATELESS and user is not None:
+        to_encode.update({
+            "user_id": user.id,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "ver": user.token_version,
+        })
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -59,6 +83,20 @@ def authenticate_user(db: Session, username: str, password: str):
     return user
 
 
+async def authenticate_user_async(db: Session, username: str, password: str):
+    """Authenticates a user with bcrypt running on the password executor.
+
+    Returns:
+        User or False: The user object if authenticated, False otherwise.
+    """
+    user = await run_in_threadpool(crud.get_user_by_username, db, username)
+    if not user:
+        return False
+    if not await passwords.verify_password(password, user.password):
+        return False
+    return user
+
+
 def verify_password(plain_password, hashed_password):
     """Verifies a plain password against a hashed password.
 
@@ -68,22 +106,61 @@ def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Retrieves the current user from a JWT token.
+def invalidate_cached_user(user_id: int):
+    """Drops every cached token that resolves to the given user.
 
     Returns:
-        schemas.User: The authenticated user object.
+        int: The number of evicted cache entries.
+    """
+    return user_cache.delete_where(lambda token, user: user.id == user_id)
+
+
+def revoke_user_tokens(user_id: int, min_version: int):
+    """Rejects the user's tokens issued with a version below `min_version`.
+
+    Revocations are kept in memory for one token lifetime, after which every
+    affected token has expired anyway.
+
+    Returns:
+        None
     """
-    credentials_exception = HTTPException(
+    now = time.time()
+    with _revoked_versions_lock:
+        for revoked_id, (_, drop_at) in list(_revoked_versions.items()):
+            if drop_at <= now:
+                del _revoked_versions[revoked_id]
+        _revoked_versions[user_id] = (min_version, now + ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    invalidate_cached_user(user_id)
+
+
+def is_token_revoked(user_id: int, version: int):
+    """Checks a stateless token's version against the revocation set.
+
+    Returns:
+        bool: True if the token was revoked, False otherwise.
+    """
+    entry = _revoked_versions.get(user_id)
+    return entry is not None and version < entry[0] and entry[1] > time.time()
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Couldn't validate credentials!",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_access_token(token: str):
+    """Decodes and validates a JWT access token.
+
+    Returns:
+        dict: The token claims; `sub` is guaranteed to be present.
+    """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
+        if payload.get("sub") is None:
+            raise _credentials_exception()
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -91,8 +168,72 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             headers={"WWW-Authenticate": "Bearer"},
         )
     except JWTError:
-        raise credentials_exception
-    user = crud.get_user_by_username(db, username=username)
-    if user is None:
-        raise credentials_exception
-    return schemas.User.model_validate(user)
+        raise _credentials_exception()
+    return payload
+
+
+def _user_from_claims(payload: dict):
+    """Builds the user from a stateless token's claims.
+
+    Returns:
+        schemas.User or None: The user, or None if the token is not stateless.
+    """
+    if not (AUTH_STATELESS and "ver" in payload):
+        return None
+    if is_token_revoked(payload["user_id"], payload["ver"]):
+        raise _credentials_exception()
+    return schemas.User(
+        id=payload["user_id"],
+        username=payload["sub"],
+        first_name=payload["first_name"],
+        last_name=payload.get("last_name"),
+    )
+
+
+def _cache_user(token: str, payload: dict, current_user: schemas.User):
+    expires_at = payload.get("exp")
+    user_cache.set(
+        token, current_user, ttl=expires_at - time.time() if expires_at else None
+    )
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Retrieves the current user from a JWT token.
+
+    Returns:
+        schemas.User: The authenticated user object.
+    """
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    payload = decode_access_token(token)
+    current_user = _user_from_claims(payload)
+    if current_user is None:
+        user = crud.get_user_by_username(db, username=payload["sub"])
+        if user is None:
+            raise _credentials_exception()
+        current_user = schemas.User.model_validate(user)
+    _cache_user(token, payload, current_user)
+    return current_user
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+):
+    """Retrieves the current user from a JWT token using an async session.
+
+    Returns:
+        schemas.User: The authenticated user object.
+    """
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    payload = decode_access_token(token)
+    current_user = _user_from_claims(payload)
+    if current_user is None:
+        user = await crud_async.get_user_by_username(db, username=payload["sub"])
+        if user is None:
+            raise _credentials_exception()
+        current_user = schemas.User.model_validate(user)
+    _cache_user(token, payload, current_user)
+    return current_user
@@ -0,0 +1,354 @@
+from fastapi import HTTPException, Request
+from pydantic import TypeAdapter, ValidationError
+from dotenv import load_dotenv
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+import csv
+import io
+import json
+import os
+import time
+from . import schemas
+
+load_dotenv()
+
+TASK_BULK_MAX_ITEMS = int(os.getenv("TASK_BULK_MAX_ITEMS", 1000))
+TASK_BULK_MAX_BYTES = int(os.getenv("TASK_BULK_MAX_BYTES", 4 * 1024 * 1024))
+# rows fetched from the server-side cursor per chunk of an export
+TASK_EXPORT_BATCH_SIZE = int(os.getenv("TASK_EXPORT_BATCH_SIZE", 1000))
+# rows validated and written per chunk of an import
+TASK_IMPORT_CHUNK_SIZE = int(os.getenv("TASK_IMPORT_CHUNK_SIZE", 5000))
+TASK_IMPORT_MAX_REJECTIONS = int(os.getenv("TASK_IMPORT_MAX_REJECTIONS", 1000))
+# longest NDJSON line or CSV record buffered while streaming an upload
+TASK_IMPORT_MAX_LINE_BYTES = int(os.getenv("TASK_IMPORT_MAX_LINE_BYTES", 65536))
+
+TASK_FIELDS = ("id", "title", "description", "status", "user_id")
+IMPORT_FIELDS = ("title", "description", "status")
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_MEDIA_TYPES = ("text/csv", "application/csv")
+
+_task_create = TypeAdapter(schemas.TaskCreate)
+
+
+class ParseError(ValueError):
+    """A record of an upload that could not be decoded."""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def check_batch_size(count: int, max_items: Optional[int] = None):
+    """Refuses batches larger than `TASK_BULK_MAX_ITEMS` with 413.
+
+    Returns:
+        None
+    """
+    if max_items is None:
+        max_items = TASK_BULK_MAX_ITEMS
+    if count > max_items:
+        raise HTTPException(
+            status_code=413, detail=f"Batch exceeds the maximum of {max_items} tasks!"
+        )
+
+
+def _check_body_size(size: int, max_bytes: int):
+    """Refuses request bodies larger than `max_bytes` with 413.
+
+    Returns:
+        None
+    """
+    if size > max_bytes:
+        raise HTTPException(
+            status_code=413, detail=f"Request body exceeds the maximum of {max_bytes} bytes!"
+        )
+
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """Reads a request body, refusing it once it grows past `max_bytes`.
+
+    Returns:
+        bytes: The whole body.
+    """
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        _check_body_size(len(body), max_bytes)
+    return bytes(body)
+
+
+def _media_type(request: Request) -> str:
+    return request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+
+def is_ndjson(request: Request) -> bool:
+    """Tells whether the request body is newline-delimited JSON.
+
+    Returns:
+        bool: True for NDJSON content types.
+    """
+    return _media_type(request) in NDJSON_MEDIA_TYPES
+
+
+def _check_line_size(size: int, line_number: int, max_bytes: int):
+    """Refuses lines longer than `max_bytes` with 413.
+
+    Returns:
+        None
+    """
+    if size > max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Line {line_number} exceeds the maximum of {max_bytes} bytes!",
+        )
+
+
+async def _iter_lines(request: Request, max_bytes: Optional[int] = None):
+    """Splits a streamed request body into lines as chunks arrive.
+
+    Each chunk is scanned once, and at most one line of up to `max_bytes`
+    (default `TASK_IMPORT_MAX_LINE_BYTES`) is buffered; a longer one is
+    refused with 413.
+
+    Yields:
+        tuple: The 1-based line number and the line without its newline.
+    """
+    if max_bytes is None:
+        max_bytes = TASK_IMPORT_MAX_LINE_BYTES
+    pending = bytearray()
+    line_number = 0
+    async for chunk in request.stream():
+        start, end = 0, chunk.find(b"\n")
+        while end >= 0:
+            pending += chunk[start:end]
+            line_number += 1
+            _check_line_size(len(pending), line_number, max_bytes)
+            yield line_number, bytes(pending)
+            pending.clear()
+            start, end = end + 1, chunk.find(b"\n", end + 1)
+        pending += chunk[start:]
+        _check_line_size(len(pending), line_number + 1, max_bytes)
+    if pending:
+        yield line_number + 1, bytes(pending)
+
+
+async def iter_ndjson(request: Request):
+    """Yields the JSON lines of a streamed request body as they arrive.
+
+    Blank lines are skipped. A line that is not valid JSON yields a
+    `ParseError` in place of its value.
+
+    Yields:
+        tuple: The 1-based line number and the decoded value.
+    """
+    async for line_number, line in _iter_lines(request):
+        if line.strip():
+            yield line_number, _decode_line(line)
+
+
+async def iter_csv(request: Request):
+    """Yields the records of a streamed CSV body with a header line.
+
+    Quoted fields may span lines, up to `TASK_IMPORT_MAX_LINE_BYTES` per
+    record; a longer record, such as the rest of a body after an unclosed
+    quote, is refused with 413. Columns other than the task's fields (for
+    example `id` in an export) are ignored, and empty cells count as unset.
+
+    Yields:
+        tuple: The 1-based line number a record starts on and the record.
+    """
+    header = None
+    record, start, quotes, size = [], 0, 0, 0
+    async for line_number, line in _iter_lines(request):
+        try:
+            text = line.decode().rstrip("\r")
+        except UnicodeDecodeError as error:
+            yield line_number, ParseError("csv_invalid", f"Invalid UTF-8: {error}")
+            continue
+        if not record:
+            start, size = line_number, 0
+        size += len(line) + 1
+        if size > TASK_IMPORT_MAX_LINE_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Record on line {start} exceeds the maximum of {TASK_IMPORT_MAX_LINE_BYTES} bytes!",
+            )
+        record.append(text)
+        # a record ends on a line that closes every quote it opened
+        quotes += text.count('"')
+        if quotes % 2:
+            continue
+        try:
+            values = next(csv.reader(["\n".join(record)]), [])
+        except csv.Error as error:
+            values = ParseError("csv_invalid", f"Invalid CSV: {error}")
+        record, quotes = [], 0
+        if isinstance(values, ParseError):
+            yield start, values
+            continue
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            if "title" not in header:
+                raise HTTPException(status_code=422, detail="CSV header must include a title column!")
+            continue
+        yield start, {
+            key: value
+            for key, value in zip(header, values)
+            if key in IMPORT_FIELDS and value != ""
+        }
+    if record:
+        yield start, ParseError("csv_invalid", "Unterminated quoted field")
+
+
+def _decode_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as error:
+        return ParseError("json_invalid", f"Invalid JSON: {error}")
+
+
+async def read_items(request: Request, max_items: Optional[int] = None, max_bytes: Optional[int] = None) -> list:
+    """Reads the items of a bulk request, a JSON array or NDJSON.
+
+    A body whose `Content-Length` exceeds `max_bytes` (default
+    `TASK_BULK_MAX_BYTES`) is refused before any of it is read, and a JSON
+    array is refused as soon as that many bytes arrive. NDJSON is parsed
+    while it streams, so an oversized batch is refused without buffering
+    the rest of the body.
+
+    Returns:
+        list: The decoded items; undecodable NDJSON lines as `ParseError`.
+    """
+    if max_items is None:
+        max_items = TASK_BULK_MAX_ITEMS
+    if max_bytes is None:
+        max_bytes = TASK_BULK_MAX_BYTES
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit():
+        _check_body_size(int(content_length), max_bytes)
+    if is_ndjson(request):
+        items = []
+        async for _, item in iter_ndjson(request):
+            items.append(item)
+            check_batch_size(len(items), max_items)
+        return items
+    try:
+        items = json.loads(await _read_body(request, max_bytes))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body!")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON array of tasks!")
+    check_batch_size(len(items), max_items)
+    return items
+
+
+def _validate_task(item):
+    """Validates one decoded item as a `TaskCreate`.
+
+    Returns:
+        tuple: The task or None, and the validation errors or None.
+    """
+    if isinstance(item, ParseError):
+        return None, [{"type": item.kind, "msg": str(item)}]
+    try:
+        return _task_create.validate_python(item), None
+    except ValidationError as error:
+        return None, error.errors(include_url=False, include_context=False, include_input=False)
+
+
+def validate_tasks(items: list) -> Tuple[List[Tuple[int, schemas.TaskCreate]], List[dict]]:
+    """Validates every item as a `TaskCreate` in one pass.
+
+    Returns:
+        tuple: The (index, task) pairs that passed and the per-item errors.
+    """
+    valid, failed = [], []
+    for index, item in enumerate(items):
+        task, errors = _validate_task(item)
+        if errors is None:
+            valid.append((index, task))
+        else:
+            failed.append({"index": index, "errors": errors})
+    return valid, failed
+
+
+async def import_tasks(request: Request, write_chunk: Callable[[list], Awaitable[int]]) -> dict:
+    """Validates a streamed NDJSON or CSV upload and writes it in chunks.
+
+    At most `TASK_IMPORT_CHUNK_SIZE` rows are held at a time. `write_chunk`
+    receives each non-empty chunk's tasks and commits them.
+
+    Returns:
+        dict: Imported (committed) and rejected counts, rejected line numbers with their
+        errors (up to `TASK_IMPORT_MAX_REJECTIONS`) and the throughput.
+    """
+    if is_ndjson(request):
+        records = iter_ndjson(request)
+    elif _media_type(request) in CSV_MEDIA_TYPES:
+        records = iter_csv(request)
+    else:
+        raise HTTPException(
+            status_code=415, detail="Upload tasks as NDJSON or CSV!"
+        )
+    started = time.perf_counter()
+    imported, rejected, rejections, chunk = 0, 0, [], []
+    async for line_number, item in records:
+        task, errors = _validate_task(item)
+        if errors is None:
+            chunk.append(task)
+            if len(chunk) == TASK_IMPORT_CHUNK_SIZE:
+                imported += await write_chunk(chunk)
+                chunk = []
+            continue
+        rejected += 1
+        if len(rejections) < TASK_IMPORT_MAX_REJECTIONS:
+            rejections.append({"line": line_number, "errors": errors})
+    if chunk:
+        imported += await write_chunk(chunk)
+    elapsed = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "rejected": rejected,
+        "rejected_lines": rejections,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round((imported + rejected) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def _task_record(row) -> dict:
+    record = {field: getattr(row, field) for field in TASK_FIELDS}
+    record["status"] = record["status"].value
+    return record
+
+
+def export_ndjson(batches: Iterable[list]):
+    """Encodes batches of task rows as NDJSON, one chunk per batch.
+
+    Yields:
+        bytes: Newline-terminated JSON objects.
+    """
+    for batch in batches:
+        yield "".join(
+            json.dumps(_task_record(row), ensure_ascii=False) + "\n" for row in batch
+        ).encode()
+
+
+def export_csv(batches: Iterable[list]):
+    """Encodes batches of task rows as CSV with a header line.
+
+    Yields:
+        bytes: CSV lines, one chunk per batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TASK_FIELDS)
+    for batch in batches:
+        for row in batch:
+            writer.writerow(_task_record(row).values())
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,404 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional
+import msgpack
+import redis
+import threading
+import time
+
+
+class TTLCache:
+    """A bounded, thread-safe LRU cache whose entries expire after a TTL.
+
+    Entries are evicted least-recently-used first once `maxsize` is reached.
+    A `maxsize` of 0 disables the cache entirely.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retrieves a live entry and marks it as recently used.
+
+        Returns:
+            Any: The cached value, or `default` if missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Stores a value, evicting the least recently used entry if full.
+
+        Returns:
+            None
+        """
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Removes a single entry if present.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_many(self, keys: Iterable[Hashable]) -> None:
+        """Removes the given entries if present.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Removes every entry for which `predicate(key, value)` is true.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        with self._lock:
+            keys = [key for key, (value, _) in self._data.items() if predicate(key, value)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drops all entries and resets the counters.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Reports the cache size and hit/miss counters.
+
+        Returns:
+            dict: Current size, capacity, hits, misses and evictions.
+        """
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class RedisCache:
+    """A TTL cache kept in Redis, or any server speaking its protocol.
+
+    All workers share it, so an invalidation in one is seen by every other.
+    Values are stored as MessagePack under `prefix` + key, and expire by the
+    server's TTL; eviction under memory pressure is the server's `maxmemory`
+    policy. Server errors are counted and treated as misses, so the cache
+    fails open to the database.
+    Invalidating a key leaves an empty tombstone for `tombstone_ttl` seconds
+    and values are only stored where there is nothing yet, so a load that
+    another worker started before the invalidation cannot put its outdated
+    value back.
+    """
+
+    _TOMBSTONE = b""
+
+    def __init__(self, client: "redis.Redis", ttl: float, prefix: str = "cache:", tombstone_ttl: float = 5.0):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.tombstone_ttl = tombstone_ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retrieves a live entry.
+
+        Returns:
+            Any: The cached value, or `default` if missing, expired or unreachable.
+        """
+        try:
+            data = self.client.get(f"{self.prefix}{key}")
+        except redis.RedisError:
+            self._count("errors")
+            return default
+        if data is None or data == self._TOMBSTONE:
+            self._count("misses")
+            return default
+        self._count("hits")
+        return msgpack.unpackb(data)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Stores a value that expires after `ttl` (capped at the cache's TTL).
+
+        Nothing is stored over a live entry or a tombstone.
+
+        Returns:
+            None
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        try:
+            self.client.set(f"{self.prefix}{key}", msgpack.packb(value), px=int(ttl * 1000), nx=True)
+        except redis.RedisError:
+            self._count("errors")
+
+    def delete(self, key: Hashable) -> None:
+        """Removes a single entry if present.
+
+        Returns:
+            None
+        """
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[Hashable]) -> None:
+        """Replaces the given entries with tombstones in one round trip.
+
+        Returns:
+            None
+        """
+        names = [f"{self.prefix}{key}" for key in keys]
+        if not names:
+            return
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for name in names:
+                pipeline.set(name, self._TOMBSTONE, px=int(self.tombstone_ttl * 1000))
+            pipeline.execute()
+        except redis.RedisError:
+            self._count("errors")
+
+    def clear(self) -> None:
+        """Drops this cache's entries (SCAN, not KEYS, so the server never blocks) and resets the counters.
+
+        Returns:
+            None
+        """
+        names = list(self.client.scan_iter(match=f"{self.prefix}*", count=1000))
+        for start in range(0, len(names), 1000):
+            self.client.delete(*names[start:start + 1000])
+        with self._lock:
+            self.hits = self.misses = self.errors = 0
+
+    def stats(self) -> dict:
+        """Reports the hit/miss counters of this process and the server's evictions.
+
+        Returns:
+            dict: Hits, misses, errors and evictions (None if the server does not report them).
+        """
+        try:
+            evictions = self.client.info("stats").get("evicted_keys")
+        except redis.RedisError:
+            evictions = None
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "evictions": evictions,
+            }
+
+
+class _Load:
+    """One in-flight load of a key, shared by the callers that missed it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.loaded = False
+        self.stale = False
+        self.value = None
+
+
+class ReadThroughCache:
+    """Loads missing entries on demand, one load per key at a time.
+
+    When a hot key expires, the callers that miss it at the same moment do
+    not all query the database: the first one loads the value and the others
+    wait for it and reuse the result. An invalidation that arrives while a
+    load is running keeps that (possibly outdated) result out of the cache
+    and from the waiters.
+    `None` results are returned but not cached. Without a backend, every call
+    loads.
+    """
+
+    def __init__(self, backend=None, wait_timeout: float = 5.0):
+        self.backend = backend
+        self.wait_timeout = wait_timeout
+        self.loads = 0
+        self.coalesced = 0
+        self._loading: dict = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @property
+    def scannable(self) -> bool:
+        return hasattr(self.backend, "delete_where")
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Returns the cached value for `key`, loading and caching it on a miss.
+
+        Returns:
+            Any: The cached or loaded value.
+        """
+        if self.backend is None:
+            return load()
+        value = self.backend.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            flight = self._loading.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._loading[key] = _Load()
+        if not leader:
+            flight.done.wait(self.wait_timeout)
+            with self._lock:
+                if flight.loaded and not flight.stale:
+                    self.coalesced += 1
+                    return flight.value
+            # the load failed, timed out or was invalidated: load ourselves
+            return load()
+        try:
+            with self._lock:
+                self.loads += 1
+            value = load()
+            with self._lock:
+                flight.value, flight.loaded = value, True
+                store = value is not None and not flight.stale
+            if store:
+                # stored outside the lock so a slow backend does not hold up
+                # every other key; an invalidation marks this load stale
+                # before deleting, so one that raced the store is redone
+                self.backend.set(key, value)
+                with self._lock:
+                    raced = flight.stale
+                if raced:
+                    self.backend.delete(key)
+            return value
+        finally:
+            with self._lock:
+                del self._loading[key]
+            flight.done.set()
+
+    def _mark_stale(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            for key in keys:
+                flight = self._loading.get(key)
+                if flight is not None:
+                    flight.stale = True
+
+    def delete(self, key: Hashable) -> None:
+        """Invalidates one key.
+
+        Returns:
+            None
+        """
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[Hashable]) -> None:
+        """Invalidates the given keys.
+
+        Returns:
+            None
+        """
+        if self.backend is None:
+            return
+        keys = list(keys)
+        self._mark_stale(keys)
+        self.backend.delete_many(keys)
+
+    def delete_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Invalidates every entry for which `predicate(key, value)` is true.
+
+        Only for backends that can be scanned (see `scannable`); loads in
+        flight are all kept out of the cache, since their values are unknown.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        with self._lock:
+            for flight in self._loading.values():
+                flight.stale = True
+        return self.backend.delete_where(predicate)
+
+    def clear(self) -> None:
+        """Drops all entries and resets the counters.
+
+        Returns:
+            None
+        """
+        if self.backend is not None:
+            self.backend.clear()
+        with self._lock:
+            self.loads = self.coalesced = 0
+
+    def stats(self) -> dict:
+        """Reports the backend's counters plus the hit ratio, loads and coalesced misses.
+
+        Returns:
+            dict: Cache counters; only `backend` when disabled.
+        """
+        if self.backend is None:
+            return {"backend": None}
+        stats = {"backend": type(self.backend).__name__, **self.backend.stats()}
+        lookups = stats["hits"] + stats["misses"]
+        with self._lock:
+            stats.update(
+                hit_ratio=stats["hits"] / lookups if lookups else None,
+                loads=self.loads,
+                coalesced=self.coalesced,
+            )
+        return stats
+
+
+def make_backend(kind: str, maxsize: int, ttl: float, redis_url: str, prefix: str):
+    """Builds a cache backend from configuration.
+
+    Returns:
+        TTLCache, RedisCache or None: The backend for `memory`, `redis` or `none`.
+    """
+    if kind == "memory":
+        return TTLCache(maxsize=maxsize, ttl=ttl)
+    if kind == "redis":
+        return RedisCache(redis.Redis.from_url(redis_url), ttl=ttl, prefix=prefix)
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown cache backend {kind!r}")
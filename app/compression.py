@@ -0,0 +1,213 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, List, Optional
+import brotli
+import os
+import zlib
+import zstandard
+
+# Encodings the server offers, most preferred first; a client's q-values
+# take precedence, this order only breaks ties.
+RESPONSE_COMPRESSION_ENCODINGS = [
+    encoding.strip()
+    for encoding in os.getenv("RESPONSE_COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+    if encoding.strip()
+]
+# smaller bodies are sent as they are: compressing them saves too little
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", 1024))
+RESPONSE_COMPRESSION_LEVELS = {
+    "gzip": int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", 6)),
+    "br": int(os.getenv("RESPONSE_COMPRESSION_BROTLI_LEVEL", 5)),
+    "zstd": int(os.getenv("RESPONSE_COMPRESSION_ZSTD_LEVEL", 3)),
+}
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/msgpack")
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+COMPRESSORS = {"gzip": _Gzip, "br": _Brotli, "zstd": _Zstd}
+
+# compressed responses and body bytes before and after, per encoding
+counters = {
+    encoding: {"responses": 0, "bytes_in": 0, "bytes_out": 0} for encoding in COMPRESSORS
+}
+
+
+def stats() -> dict:
+    """Reports compressed responses and bytes before and after, per encoding.
+
+    Returns:
+        dict: Counters by encoding.
+    """
+    return {encoding: dict(values) for encoding, values in counters.items()}
+
+
+def negotiate(accept_encoding: str, offered: List[str]) -> Optional[str]:
+    """Picks the response encoding from an `Accept-Encoding` header.
+
+    The client's highest q-value wins; among equal ones the first offered
+    encoding. `*` covers encodings the client does not name, and q=0 refuses.
+
+    Returns:
+        str or None: The encoding, or None to send the body uncompressed.
+    """
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name] = quality
+    best, best_quality = None, 0.0
+    for encoding in offered:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """Compresses responses with the encoding negotiated from `Accept-Encoding`.
+
+    Complete bodies below `minimum_size` are left alone. Streamed bodies
+    (e.g. the export) are compressed chunk by chunk and flushed after each, so
+    the client still receives every chunk as soon as it is produced.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Optional[List[str]] = None,
+        minimum_size: Optional[int] = None,
+        levels: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.encodings = [
+            encoding for encoding in (encodings or RESPONSE_COMPRESSION_ENCODINGS)
+            if encoding in COMPRESSORS
+        ]
+        self.minimum_size = (
+            RESPONSE_COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        )
+        self.levels = {**RESPONSE_COMPRESSION_LEVELS, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self, encoding)(scope, receive, send)
+
+
+class _Responder:
+    """Compresses one response; holds its start message until the first body part."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.counters = counters[encoding]
+        self.start: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.middleware.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            headers["Content-Encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # the compressed bytes differ from the identity ones
+                headers["ETag"] = f"W/{etag}"
+            if more_body:
+                del headers["Content-Length"]
+            self.compressor = COMPRESSORS[self.encoding](self.middleware.levels[self.encoding])
+            self.counters["responses"] += 1
+            if not more_body:
+                compressed = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(compressed))
+                self._count(body, compressed)
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            await self.send(start)
+
+        compressed = self.compressor.compress(body) if more_body else self.compressor.finish(body)
+        self._count(body, compressed)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _count(self, body: bytes, compressed: bytes) -> None:
+        self.counters["bytes_in"] += len(body)
+        self.counters["bytes_out"] += len(compressed)
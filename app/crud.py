@@ -1,9 +1,71 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from typing import Optional, List, Tuple
+from sqlalchemy import Double, and_, cast, column, delete, func, insert, literal_column, or_, select, table, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Sequence, Tuple
+import io
+import os
 from . import models, schemas
-from passlib.context import CryptContext
-from .auth import pwd_context
+from .auth import pwd_context, revoke_user_tokens
+from .cache import ReadThroughCache, make_backend
+
+# accounts with more tasks than this are deleted by a chunked background purge
+USER_PURGE_THRESHOLD = int(os.getenv("USER_PURGE_THRESHOLD", 10000))
+USER_PURGE_BATCH_SIZE = int(os.getenv("USER_PURGE_BATCH_SIZE", 1000))
+
+# single-task reads go through this cache when enabled; every task write below invalidates it
+TASK_CACHE_BACKEND = os.getenv("TASK_CACHE_BACKEND", "none")
+TASK_CACHE_SIZE = int(os.getenv("TASK_CACHE_SIZE", 10000))
+TASK_CACHE_TTL_SECONDS = float(os.getenv("TASK_CACHE_TTL_SECONDS", 10))
+TASK_CACHE_REDIS_URL = os.getenv("TASK_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+task_cache = ReadThroughCache(make_backend(
+    TASK_CACHE_BACKEND, TASK_CACHE_SIZE, TASK_CACHE_TTL_SECONDS,
+    TASK_CACHE_REDIS_URL, prefix="task:",
+))
+
+# set while `crud_async` runs these functions on the event loop, where task
+# invalidations are collected instead of blocking on the cache backend
+_deferred_invalidations: ContextVar[Optional[list]] = ContextVar("deferred_invalidations", default=None)
+
+# a task as served from `task_cache`, in the order of the response fields
+CachedTask = namedtuple("CachedTask", ["title", "description", "status", "id", "user_id", "version"])
+
+
+@contextmanager
+def deferred_task_invalidations():
+    """Collects the task invalidations of the writes inside the block.
+
+    Used by `crud_async`, whose writes run on the event loop, so that it can
+    invalidate the collected IDs from the threadpool afterwards.
+
+    Returns:
+        Iterator[list]: The IDs of the tasks to invalidate, filled by the block.
+    """
+    task_ids = []
+    token = _deferred_invalidations.set(task_ids)
+    try:
+        yield task_ids
+    finally:
+        _deferred_invalidations.reset(token)
+
+
+def _invalidate_tasks(task_ids: Sequence[int]) -> None:
+    """Drops tasks from `task_cache`, or defers that (see `deferred_task_invalidations`).
+
+    Returns:
+        None
+    """
+    if not task_cache.enabled:
+        return
+    deferred = _deferred_invalidations.get()
+    if deferred is not None:
+        deferred.extend(task_ids)
+    else:
+        task_cache.delete_many(task_ids)
 
 
 def get_user_by_username(db: Session, username: str):
@@ -12,27 +74,34 @@ def get_user_by_username(db: Session, username: str):
     Returns:
         User or None: The user object if found, None otherwise.
     """
-    return db.query(models.User).filter(models.User.username == username).first()
+    return db.query(models.User).filter(
+        models.User.username == username, models.User.is_active.is_(True)
+    ).first()
 
 
-def create_user(db: Session, user: schemas.UserCreate):
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
     """Creates a new user with hashed password.
 
+    The password is hashed inline unless the caller already hashed it.
+
     Returns:
-        User: The created user object.
+        Row: The created user.
     """
-    try:
+    if hashed_password is None:
         hashed_password = pwd_context.hash(user.password)
-        db_user = models.User(
-            first_name=user.first_name,
-            last_name=user.last_name,
-            username=user.username,
-            password=hashed_password,
-        )
-        db.add(db_user)
+    try:
+        row = db.execute(
+            insert(models.User)
+            .values(
+                first_name=user.first_name,
+                last_name=user.last_name,
+                username=user.username,
+                password=hashed_password,
+            )
+            .returning(*models.User.__table__.columns)
+        ).first()
         db.commit()
-        db.refresh(db_user)
-        return db_user
+        return row
     except IntegrityError:
         db.rollback()
         raise HTTPException(
@@ -44,117 +113,721 @@ def create_user(db: Session, user: schemas.UserCreate):
 def delete_user(db: Session, user_id: int):
     """Deletes a user by their ID.
 
+    The user's tasks are removed by the database's `ON DELETE CASCADE`,
+    without loading them; only a Redis task cache needs their IDs read first.
+
+    Returns:
+        None
+    """
+    task_ids = []
+    if task_cache.enabled and not task_cache.scannable:
+        # the cascade does not report what it deleted, and Redis entries can
+        # only be invalidated by ID
+        task_ids = db.execute(
+            select(models.Task.id).where(models.Task.user_id == user_id)
+        ).scalars().all()
+    token_version = db.execute(
+        delete(models.User)
+        .where(models.User.id == user_id)
+        .returning(models.User.token_version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if token_version is None:
+        raise HTTPException(status_code=404, detail="User not found!")
+    db.query(models.TaskCounter).filter(models.TaskCounter.user_id == user_id).delete()
+    db.commit()
+    if task_cache.scannable:
+        task_cache.delete_where(lambda task_id, task: task[4] == user_id)
+    else:
+        _invalidate_tasks(task_ids)
+    revoke_user_tokens(user_id, token_version + 1)
+
+
+def deactivate_user(db: Session, user_id: int):
+    """Locks a user out ahead of a background purge of their account.
+
+    The user can no longer log in and their existing tokens are revoked.
+
     Returns:
         None
     """
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+    token_version = db.execute(
+        update(models.User)
+        .where(models.User.id == user_id, models.User.is_active.is_(True))
+        .values(is_active=False, token_version=models.User.token_version + 1)
+        .returning(models.User.token_version)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if token_version is None:
         raise HTTPException(status_code=404, detail="User not found!")
-    db.delete(user)
     db.commit()
+    revoke_user_tokens(user_id, token_version)
+
+
+def purge_user(db: Session, user_id: int, batch_size: Optional[int] = None):
+    """Deletes a user's tasks in bounded batches, then the user.
+
+    Every batch commits on its own, so no single transaction holds locks on
+    a large share of the tasks table.
+
+    Returns:
+        int: The number of deleted tasks.
+    """
+    batch_size = batch_size or USER_PURGE_BATCH_SIZE
+    batch = (
+        select(models.Task.id)
+        .where(models.Task.user_id == user_id)
+        .order_by(models.Task.id)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    purged = 0
+    while True:
+        deleted = db.execute(
+            delete(models.Task)
+            .where(models.Task.id.in_(batch))
+            .returning(models.Task.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.commit()
+        _invalidate_tasks(deleted)
+        purged += len(deleted)
+        if len(deleted) < batch_size:
+            break
+    db.execute(delete(models.User).where(models.User.id == user_id))
+    db.query(models.TaskCounter).filter(models.TaskCounter.user_id == user_id).delete()
+    db.commit()
+    return purged
 
 
-def get_task(db: Session, task_id: int):
-    """Retrieves a task by its ID.
+def purge_inactive_users(db: Session):
+    """Finishes background purges that were interrupted, e.g. by a restart.
 
     Returns:
-        Task or None: The task object if found, None otherwise.
+        list: The IDs of the purged users.
     """
-    return db.query(models.Task).filter(models.Task.id == task_id).first()
+    user_ids = db.execute(
+        select(models.User.id).where(models.User.is_active.is_(False))
+    ).scalars().all()
+    for user_id in user_ids:
+        purge_user(db, user_id)
+    return user_ids
+
 
+def _task_query(db: Session, columns: Optional[Sequence[str]] = None) -> Query:
+    """Queries whole tasks, or only the named columns as rows.
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 10, status: Optional[schemas.TaskStatus] = None) -> Tuple[List[models.Task], int]:
+    Returns:
+        Query: The task query.
+    """
+    if columns is None:
+        return db.query(models.Task)
+    return db.query(*(models.Task.__table__.c[name] for name in columns))
+
+
+def get_task(db: Session, task_id: int, columns: Optional[Sequence[str]] = None):
+    """Retrieves a task by its ID, optionally only some of its columns.
+
+    Returns:
+        Task or None: The task object (a row when `columns` is given) if found, None otherwise.
+    """
+    return _task_query(db, columns).filter(models.Task.id == task_id).first()
+
+
+def get_cached_task(db: Session, task_id: int) -> Optional[CachedTask]:
+    """Retrieves a task by its ID through `task_cache`.
+
+    On a miss the task is read from the database and cached for
+    `TASK_CACHE_TTL_SECONDS`; concurrent misses on the same task share one
+    read. Task writes invalidate the entry.
+
+    Returns:
+        CachedTask or None: The task if found, None otherwise.
+    """
+    def load():
+        row = db.execute(
+            select(*(models.Task.__table__.c[name] for name in CachedTask._fields))
+            .where(models.Task.id == task_id)
+        ).first()
+        # plain values, so any backend can store them
+        return None if row is None else (*row[:2], row.status.value, *row[3:])
+
+    value = task_cache.get(task_id, load)
+    if value is None:
+        return None
+    title, description, status, *rest = value
+    return CachedTask(title, description, models.TaskStatus(status), *rest)
+
+
+def count_tasks(db: Session, user_id: Optional[int] = None, status: Optional[schemas.TaskStatus] = None) -> int:
+    """Counts tasks exactly from the maintained counter rows.
+
+    Counts all users' tasks when `user_id` is None, by summing every user's
+    counter rows. That reads one row per user and status, so unlike a
+    single user's count it grows with the number of users; it is the price
+    of not having one all-users row that every task write would lock.
+
+    Returns:
+        int: The number of matching tasks.
+    """
+    query = db.query(func.coalesce(func.sum(models.TaskCounter.task_count), 0))
+    if user_id is not None:
+        query = query.filter(models.TaskCounter.user_id == user_id)
+    if status:
+        query = query.filter(models.TaskCounter.status == status)
+    return int(query.scalar())
+
+
+def get_task_stats(db: Session, user_id: int) -> dict:
+    """Reads a user's task counts per status from the counter rows.
+
+    Returns:
+        dict: The count for every status and their total.
+    """
+    counts = {status: 0 for status in models.TaskStatus}
+    rows = db.query(models.TaskCounter.status, models.TaskCounter.task_count).filter(
+        models.TaskCounter.user_id == user_id
+    )
+    for status, task_count in rows:
+        counts[status] = int(task_count)
+    return {
+        "by_status": {status.value: count for status, count in counts.items()},
+        "total": sum(counts.values()),
+    }
+
+
+def estimate_count(db: Session, query: Query) -> Optional[int]:
+    """Reads the PostgreSQL planner's row estimate for a query.
+
+    Returns:
+        int or None: The estimated row count, or None on other databases.
+    """
+    dialect = db.get_bind().dialect
+    if dialect.name != "postgresql":
+        return None
+    statement = query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _total(db: Session, query: Query, total_mode: schemas.TotalMode, user_id: Optional[int] = None, status: Optional[schemas.TaskStatus] = None) -> Optional[int]:
+    if total_mode == schemas.TotalMode.NONE:
+        return None
+    if total_mode == schemas.TotalMode.APPROXIMATE:
+        estimate = estimate_count(db, query)
+        if estimate is not None:
+            return estimate
+    return count_tasks(db, user_id=user_id, status=status)
+
+
+def get_tasks(db: Session, skip: int = 0, limit: int = 10, status: Optional[schemas.TaskStatus] = None, after_id: Optional[int] = None, total_mode: schemas.TotalMode = schemas.TotalMode.EXACT, columns: Optional[Sequence[str]] = None) -> Tuple[List[models.Task], Optional[int], bool]:
     """Retrieves a list of tasks with pagination and optional status filter.
 
+    Tasks are ordered by id. Passing `after_id` (keyset pagination) starts
+    the page right after that task instead of skipping rows. The total is
+    read from the counter rows, estimated, or omitted per `total_mode`.
+    With `columns`, only those columns are read and rows are returned.
+
     Returns:
-        tuple: List of tasks and total count.
+        tuple: List of tasks, total count (None if omitted) and whether more tasks follow.
     """
-    query = db.query(models.Task)
+    query = _task_query(db, columns)
     if status:
         query = query.filter(models.Task.status == status)
-    total = query.count()
-    tasks = query.offset(skip).limit(limit).all()
-    return tasks, total
+    total = _total(db, query, total_mode, status=status)
+    if after_id is not None:
+        query = query.filter(models.Task.id > after_id)
+    tasks = query.order_by(models.Task.id).offset(skip).limit(limit + 1).all()
+    return tasks[:limit], total, len(tasks) > limit
 
 
-def get_user_tasks(db: Session, user_id: int, skip: int = 0, limit: int = 10) -> Tuple[List[models.Task], int]:
+def get_user_tasks(db: Session, user_id: int, skip: int = 0, limit: int = 10, after_id: Optional[int] = None, total_mode: schemas.TotalMode = schemas.TotalMode.EXACT, columns: Optional[Sequence[str]] = None) -> Tuple[List[models.Task], Optional[int], bool]:
     """Retrieves a list of tasks for a specific user with pagination.
 
+    Tasks are ordered by id. Passing `after_id` (keyset pagination) starts
+    the page right after that task instead of skipping rows. The total is
+    read from the counter rows, estimated, or omitted per `total_mode`.
+    With `columns`, only those columns are read and rows are returned.
+
     Returns:
-        tuple: List of user tasks and total count.
+        tuple: List of user tasks, total count (None if omitted) and whether more tasks follow.
     """
-    query = db.query(models.Task).filter(models.Task.user_id == user_id)
-    total = query.count()
-    tasks = query.offset(skip).limit(limit).all()
-    return tasks, total
+    query = _task_query(db, columns).filter(models.Task.user_id == user_id)
+    total = _total(db, query, total_mode, user_id=user_id)
+    if after_id is not None:
+        query = query.filter(models.Task.id > after_id)
+    tasks = query.order_by(models.Task.id).offset(skip).limit(limit + 1).all()
+    return tasks[:limit], total, len(tasks) > limit
+
+
+def _fts5_query(q: str) -> str:
+    """Quotes every word of a search so FTS5 treats none as syntax.
+
+    Returns:
+        str: An FTS5 query matching all the words.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"' for word in q.split())
+
+
+def search_user_tasks(db: Session, user_id: int, q: str, limit: int = 10, after: Optional[Tuple[float, int]] = None) -> Tuple[list, bool]:
+    """Full-text searches a user's task titles and descriptions.
+
+    Matches go through the GIN-indexed `search_vector` on PostgreSQL and
+    the FTS5 table on SQLite. Results are ordered by relevance `score`
+    (title matches weigh more), then ID, and page by that (score, id) key.
+
+    Returns:
+        tuple: Matching task rows with a `score` and whether more follow.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        query = func.websearch_to_tsquery(models.SEARCH_CONFIG, q)
+        vector = literal_column("tasks.search_vector")
+        # ts_rank_cd returns real; as double precision the score read back
+        # into the cursor compares equal to the stored one
+        score = cast(func.ts_rank_cd(vector, query), Double)
+        statement = select(*models.Task.__table__.columns, score.label("score")).where(
+            vector.op("@@")(query)
+        )
+    else:
+        fts = table("tasks_fts", column("rowid"))
+        # bm25 is lower for better matches; negate it so both rank descending
+        score = -func.bm25(literal_column("tasks_fts"), 2.0, 1.0)
+        statement = (
+            select(*models.Task.__table__.columns, score.label("score"))
+            .join_from(models.Task, fts, fts.c.rowid == models.Task.id)
+            .where(literal_column("tasks_fts").op("MATCH")(_fts5_query(q)))
+        )
+    statement = statement.where(models.Task.user_id == user_id)
+    if after is not None:
+        statement = statement.where(or_(
+            score < after[0], and_(score == after[0], models.Task.id > after[1])
+        ))
+    rows = db.execute(
+        statement.order_by(score.desc(), models.Task.id).limit(limit + 1)
+    ).all()
+    return rows[:limit], len(rows) > limit
+
+
+def iter_user_tasks(db: Session, user_id: int, batch_size: int = 1000):
+    """Streams a user's tasks in ID order from a server-side cursor.
+
+    Only one batch of rows is held in memory at a time.
+
+    Yields:
+        list: The next batch of task rows.
+    """
+    result = db.execute(
+        select(*models.Task.__table__.columns)
+        .where(models.Task.user_id == user_id)
+        .order_by(models.Task.id)
+        .execution_options(yield_per=batch_size)
+    )
+    yield from result.partitions()
+
+
+def rebuild_task_counters(db: Session):
+    """Recomputes every counter row from the tasks table.
+
+    Writes to tasks are blocked on PostgreSQL while the counters rebuild;
+    the lock mode also conflicts with itself, so concurrent rebuilds run one
+    after the other instead of inserting the same counter rows.
+
+    Returns:
+        None
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE tasks IN SHARE ROW EXCLUSIVE MODE"))
+    db.query(models.TaskCounter).delete()
+    per_user = select(
+        models.Task.user_id, models.Task.status, func.count()
+    ).group_by(models.Task.user_id, models.Task.status)
+    db.execute(
+        insert(models.TaskCounter).from_select(
+            ["user_id", "status", "task_count"], per_user
+        )
+    )
+    db.commit()
+
+
+def verify_task_counters(db: Session) -> List[dict]:
+    """Compares every counter row with a fresh count of the tasks table.
+
+    Returns:
+        list: One entry per user and status whose counter has drifted.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # read both sides from one snapshot so concurrent writes don't show as drift
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    actual = {}
+    per_user = db.query(
+        models.Task.user_id, models.Task.status, func.count()
+    ).group_by(models.Task.user_id, models.Task.status)
+    for user_id, status, n in per_user:
+        actual[(user_id, status)] = n
+    counted = {
+        (user_id, status): int(task_count)
+        for user_id, status, task_count in db.query(
+            models.TaskCounter.user_id, models.TaskCounter.status, models.TaskCounter.task_count
+        )
+    }
+    return [
+        {"user_id": user_id, "status": status.value, "counted": counted.get((user_id, status), 0), "actual": actual.get((user_id, status), 0)}
+        for user_id, status in sorted(set(actual) | set(counted), key=lambda key: (key[0], key[1].value))
+        if counted.get((user_id, status), 0) != actual.get((user_id, status), 0)
+    ]
 
 
 def create_task(db: Session, task: schemas.TaskCreate, user_id: int):
     """Creates a new task for a user.
 
+    Relies on the foreign key rather than looking the user up first.
+
     Returns:
-        Task: The created task object.
+        Row: The created task.
     """
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+    try:
+        row = db.execute(
+            insert(models.Task)
+            .values(**task.model_dump(), user_id=user_id)
+            .returning(*models.Task.__table__.columns)
+        ).first()
+        db.commit()
+        return row
+    except IntegrityError:
+        db.rollback()
         raise HTTPException(
             status_code=404,
             detail=f"User with id {user_id} not found"
         )
-    db_task = models.Task(**task.model_dump(), user_id=user_id)
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
-    return db_task
 
 
-def update_task(db: Session, task_id: int, task: schemas.TaskUpdate):
-    """Updates an existing task.
+def _copy_value(value) -> str:
+    """Formats a value for PostgreSQL's text `COPY` format.
+
+    Returns:
+        str: The escaped value, or the NULL marker for None.
+    """
+    if value is None:
+        return "\\N"
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t")
+        .replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def _copy_rows(db: Session, rows: List[dict], columns: Tuple[str, ...]):
+    """Streams rows into the tasks table with `COPY FROM STDIN`.
+
+    Returns:
+        None
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[column]) for column in columns) + "\n")
+    buffer.seek(0)
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY tasks ({', '.join(columns)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+
+def _copy_tasks(db: Session, rows: List[dict]) -> List[int]:
+    """Loads tasks with `COPY`, preallocating their IDs from the sequence.
+
+    Returns:
+        list: The new task IDs, in input order.
+    """
+    ids = db.execute(
+        text("SELECT nextval(pg_get_serial_sequence('tasks', 'id')) FROM generate_series(1, :n)"),
+        {"n": len(rows)},
+    ).scalars().all()
+    rows = [dict(row, id=task_id) for task_id, row in zip(ids, rows)]
+    _copy_rows(db, rows, ("id", "title", "description", "status", "user_id"))
+    return ids
+
+
+def _insert_tasks(db: Session, rows: List[dict]) -> List[int]:
+    """Inserts tasks with one multi-row `INSERT ... RETURNING` per batch.
 
     Returns:
-        Task: The updated task object.
+        list: The new task IDs, in input order.
     """
-    db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if not db_task:
+    return db.execute(
+        insert(models.Task).returning(models.Task.id, sort_by_parameter_order=True),
+        rows,
+    ).scalars().all()
+
+
+def _task_rows(tasks: List[schemas.TaskCreate], user_id: int) -> List[dict]:
+    return [
+        {
+            "title": task.title,
+            "description": task.description,
+            "status": task.status.value,
+            "user_id": user_id,
+        }
+        for task in tasks
+    ]
+
+
+def _user_not_found(db: Session, user_id: int):
+    db.rollback()
+    return HTTPException(
+        status_code=404,
+        detail=f"User with id {user_id} not found"
+    )
+
+
+def create_tasks(db: Session, tasks: List[schemas.TaskCreate], user_id: int) -> List[int]:
+    """Creates many tasks for a user in one transaction.
+
+    Uses `COPY` on PostgreSQL with psycopg2 and batched multi-row inserts
+    elsewhere.
+
+    Returns:
+        list: The new task IDs, in the order of `tasks`.
+    """
+    if not tasks:
+        return []
+    rows = _task_rows(tasks, user_id)
+    connection = db.connection()
+    try:
+        if connection.dialect.driver == "psycopg2":
+            ids = _copy_tasks(db, rows)
+        else:
+            ids = _insert_tasks(db, rows)
+        db.commit()
+        return ids
+    except (IntegrityError, connection.dialect.dbapi.IntegrityError):
+        raise _user_not_found(db, user_id)
+
+
+def import_tasks(db: Session, tasks: List[schemas.TaskCreate], user_id: int) -> int:
+    """Writes and commits one chunk of an import.
+
+    Uses `COPY` on PostgreSQL with psycopg2 and a batched `executemany`
+    insert elsewhere; no IDs are returned, so neither needs `RETURNING`.
+
+    Returns:
+        int: The number of written tasks.
+    """
+    connection = db.connection()
+    try:
+        rows = _task_rows(tasks, user_id)
+        if connection.dialect.driver == "psycopg2":
+            _copy_rows(db, rows, ("title", "description", "status", "user_id"))
+        else:
+            db.execute(insert(models.Task), rows)
+        db.commit()
+    except (IntegrityError, connection.dialect.dbapi.IntegrityError):
+        raise _user_not_found(db, user_id)
+    return len(tasks)
+
+
+def _raise_task_error(db: Session, task_id: int, user_id: int, action: str, versions: Optional[List[int]] = None):
+    """Explains why a statement scoped to the user's task matched no row.
+
+    Returns:
+        Row: The task, when it exists, belongs to the user and matches `versions`.
+    """
+    row = db.execute(
+        select(models.Task.user_id, models.Task.status, models.Task.version)
+        .where(models.Task.id == task_id)
+    ).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Task not found!")
+    if row.user_id != user_id:
+        raise HTTPException(
+            status_code=403, detail=f"Not authorized to {action} this task!"
+        )
+    if versions is not None and row.version not in versions:
+        raise HTTPException(status_code=412, detail="Task has been modified!")
+    return row
+
+
+def _version_criteria(versions: Optional[List[int]]) -> list:
+    """Builds the optimistic-concurrency criterion of an `If-Match` write.
+
+    Returns:
+        list: SQL criteria, empty when any version may be overwritten.
+    """
+    return [] if versions is None else [models.Task.version.in_(versions)]
+
+
+def _update_owned_task(db: Session, task_id: int, user_id: int, values: dict, *criteria):
+    """Runs one `UPDATE ... RETURNING` on a task owned by the user, bumping its version.
+
+    Returns:
+        Row or None: The updated task, None if no row matched.
+    """
+    statement = (
+        update(models.Task)
+        .where(models.Task.id == task_id, models.Task.user_id == user_id, *criteria)
+        .values(**values, version=models.Task.version + 1)
+        .returning(*models.Task.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(statement).first()
+    if row is not None:
+        db.commit()
+        _invalidate_tasks([task_id])
+    return row
+
+
+def update_task(db: Session, task_id: int, task: schemas.TaskUpdate, user_id: int, versions: Optional[List[int]] = None):
+    """Updates a task owned by the user in a single statement.
+
+    With `versions` (from `If-Match`), the task is only updated while its
+    version is one of them, and 412 is raised otherwise.
+
+    Returns:
+        Row: The updated task.
+    """
     update_data = task.model_dump(exclude_unset=True)
     if not update_data:
-        return db_task
-    for key, value in update_data.items():
-        setattr(db_task, key, value)
-    db.commit()
-    db.refresh(db_task)
-    return db_task
+        row = db.execute(
+            select(*models.Task.__table__.columns).where(models.Task.id == task_id)
+        ).first()
+        if row is None or row.user_id != user_id or (
+            versions is not None and row.version not in versions
+        ):
+            _raise_task_error(db, task_id, user_id, "update", versions)
+        return row
+    row = _update_owned_task(db, task_id, user_id, update_data, *_version_criteria(versions))
+    if row is None:
+        _raise_task_error(db, task_id, user_id, "update", versions)
+    return row
+
 
+def complete_task(db: Session, task_id: int, user_id: int, versions: Optional[List[int]] = None):
+    """Marks a task owned by the user as completed in a single statement.
 
-def complete_task(db: Session, task_id: int):
-    """Marks a task as completed.
+    `versions` works as for `update_task`.
 
     Returns:
-        Task: The updated task object.
+        Row: The updated task.
     """
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found!")
-    if task.status == models.TaskStatus.COMPLETED:
+    row = _update_owned_task(
+        db, task_id, user_id,
+        {"status": models.TaskStatus.COMPLETED},
+        models.Task.status != models.TaskStatus.COMPLETED,
+        *_version_criteria(versions),
+    )
+    if row is None:
+        _raise_task_error(db, task_id, user_id, "update", versions)
         raise HTTPException(
             status_code=400,
             detail="Task is already completed!"
         )
-    task.status = models.TaskStatus.COMPLETED
+    return row
+
+
+def delete_task(db: Session, task_id: int, user_id: int, versions: Optional[List[int]] = None):
+    """Deletes a task owned by the user in a single statement.
+
+    `versions` works as for `update_task`.
+
+    Returns:
+        int: The ID of the deleted task.
+    """
+    deleted_id = db.execute(
+        delete(models.Task)
+        .where(
+            models.Task.id == task_id, models.Task.user_id == user_id,
+            *_version_criteria(versions),
+        )
+        .returning(models.Task.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if deleted_id is None:
+        _raise_task_error(db, task_id, user_id, "delete", versions)
     db.commit()
-    db.refresh(task)
-    return task
+    _invalidate_tasks([deleted_id])
+    return deleted_id
 
 
-def delete_task(db: Session, task_id: int):
-    """Deletes a task by its ID.
+def _bulk_report(db: Session, user_id: int, ids: Optional[List[int]], changed: List[int]) -> dict:
+    """Sorts the requested IDs a bulk statement did not change by reason.
 
     Returns:
-        None
+        dict: Changed IDs plus the missing, not owned and unchanged ones.
     """
-    db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if db_task:
-        db.delete(db_task)
-        db.commit()
-    return db_task
\ No newline at end of file
+    report = {"ids": sorted(changed), "missing": [], "not_owned": [], "unchanged": []}
+    remaining = set(ids or ()) - set(changed)
+    if not remaining:
+        return report
+    owners = dict(db.execute(
+        select(models.Task.id, models.Task.user_id).where(models.Task.id.in_(remaining))
+    ).all())
+    for task_id in sorted(remaining):
+        if task_id not in owners:
+            report["missing"].append(task_id)
+        elif owners[task_id] != user_id:
+            report["not_owned"].append(task_id)
+        else:
+            report["unchanged"].append(task_id)
+    return report
+
+
+def _bulk_scope(user_id: int, ids: Optional[List[int]], status: Optional[schemas.TaskStatus]) -> list:
+    """Builds the WHERE criteria of a bulk statement on the user's tasks.
+
+    Returns:
+        list: SQL criteria.
+    """
+    criteria = [models.Task.user_id == user_id]
+    if ids is not None:
+        criteria.append(models.Task.id.in_(ids))
+    if status is not None:
+        criteria.append(models.Task.status == status.value)
+    return criteria
+
+
+def bulk_update_tasks(db: Session, user_id: int, values: dict, ids: Optional[List[int]] = None, status: Optional[schemas.TaskStatus] = None, *criteria) -> dict:
+    """Updates the user's tasks selected by IDs or status in one statement.
+
+    Returns:
+        dict: Updated IDs plus the missing, not owned and unchanged ones.
+    """
+    changed = db.execute(
+        update(models.Task)
+        .where(*_bulk_scope(user_id, ids, status), *criteria)
+        .values(**values, version=models.Task.version + 1)
+        .returning(models.Task.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    _invalidate_tasks(changed)
+    return _bulk_report(db, user_id, ids, changed)
+
+
+def bulk_complete_tasks(db: Session, user_id: int, ids: Optional[List[int]] = None, status: Optional[schemas.TaskStatus] = None) -> dict:
+    """Marks the user's tasks selected by IDs or status as completed.
+
+    Tasks that are already completed are reported as unchanged.
+
+    Returns:
+        dict: Completed IDs plus the missing, not owned and unchanged ones.
+    """
+    return bulk_update_tasks(
+        db, user_id, {"status": models.TaskStatus.COMPLETED}, ids, status,
+        models.Task.status != models.TaskStatus.COMPLETED,
+    )
+
+
+def bulk_delete_tasks(db: Session, user_id: int, ids: Optional[List[int]] = None, status: Optional[schemas.TaskStatus] = None) -> dict:
+    """Deletes the user's tasks selected by IDs or status in one statement.
+
+    Returns:
+        dict: Deleted IDs plus the missing and not owned ones.
+    """
+    deleted = db.execute(
+        delete(models.Task)
+        .where(*_bulk_scope(user_id, ids, status))
+        .returning(models.Task.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    _invalidate_tasks(deleted)
+    return _bulk_report(db, user_id, ids, deleted)
@@ -0,0 +1,143 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, List, Tuple
+from . import crud, models, schemas
+
+# Each function runs its `crud` counterpart through `AsyncSession.run_sync`:
+# the query code is shared, but the I/O goes through the asyncio driver on
+# the event loop instead of holding a threadpool thread for the round trip.
+
+
+async def _run_write(db: AsyncSession, fn, *args):
+    """Runs a task-writing `crud` function, then its cache invalidations.
+
+    The task cache client is blocking (a Redis round trip), so the
+    invalidations are collected during `run_sync` and sent from the
+    threadpool instead of from the event loop.
+
+    Returns:
+        Any: What `fn` returned.
+    """
+    with crud.deferred_task_invalidations() as task_ids:
+        try:
+            return await db.run_sync(fn, *args)
+        finally:
+            if task_ids:
+                await run_in_threadpool(crud.task_cache.delete_many, task_ids)
+
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    """Retrieves a user by their username.
+
+    Returns:
+        User or None: The user object if found, None otherwise.
+    """
+    return await db.run_sync(crud.get_user_by_username, username)
+
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    """Creates a new user with hashed password.
+
+    Returns:
+        Row: The created user.
+    """
+    return await db.run_sync(crud.create_user, user, hashed_password)
+
+
+async def delete_user(db: AsyncSession, user_id: int):
+    """Deletes a user by their ID.
+
+    Returns:
+        None
+    """
+    return await _run_write(db, crud.delete_user, user_id)
+
+
+async def deactivate_user(db: AsyncSession, user_id: int):
+    """Locks a user out ahead of a background purge of their account.
+
+    Returns:
+        None
+    """
+    return await db.run_sync(crud.deactivate_user, user_id)
+
+
+async def purge_user(db: AsyncSession, user_id: int, batch_size: Optional[int] = None):
+    """Deletes a user's tasks in batches, then the user.
+
+    Returns:
+        int: The number of purged tasks.
+    """
+    return await _run_write(db, crud.purge_user, user_id, batch_size)
+
+
+async def count_tasks(db: AsyncSession, user_id: Optional[int] = None, status: Optional[schemas.TaskStatus] = None) -> int:
+    """Counts tasks exactly from the maintained counter rows.
+
+    Returns:
+        int: The number of matching tasks.
+    """
+    return await db.run_sync(crud.count_tasks, user_id, status)
+
+
+async def get_task(db: AsyncSession, task_id: int):
+    """Retrieves a task by its ID.
+
+    Returns:
+        Task or None: The task object if found, None otherwise.
+    """
+    return await db.run_sync(crud.get_task, task_id)
+
+
+async def get_tasks(db: AsyncSession, skip: int = 0, limit: int = 10, status: Optional[schemas.TaskStatus] = None, after_id: Optional[int] = None, total_mode: schemas.TotalMode = schemas.TotalMode.EXACT) -> Tuple[List[models.Task], Optional[int], bool]:
+    """Retrieves a list of tasks with pagination and optional status filter.
+
+    Returns:
+        tuple: List of tasks, total count (None if omitted) and whether more tasks follow.
+    """
+    return await db.run_sync(crud.get_tasks, skip=skip, limit=limit, status=status, after_id=after_id, total_mode=total_mode)
+
+
+async def get_user_tasks(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 10, after_id: Optional[int] = None, total_mode: schemas.TotalMode = schemas.TotalMode.EXACT) -> Tuple[List[models.Task], Optional[int], bool]:
+    """Retrieves a list of tasks for a specific user with pagination.
+
+    Returns:
+        tuple: List of user tasks, total count (None if omitted) and whether more tasks follow.
+    """
+    return await db.run_sync(crud.get_user_tasks, user_id, skip=skip, limit=limit, after_id=after_id, total_mode=total_mode)
+
+
+async def create_task(db: AsyncSession, task: schemas.TaskCreate, user_id: int):
+    """Creates a new task for a user in a single statement.
+
+    Returns:
+        Row: The created task.
+    """
+    return await db.run_sync(crud.create_task, task, user_id)
+
+
+async def update_task(db: AsyncSession, task_id: int, task: schemas.TaskUpdate, user_id: int):
+    """Updates a task owned by the user in a single statement.
+
+    Returns:
+        Row: The updated task.
+    """
+    return await _run_write(db, crud.update_task, task_id, task, user_id)
+
+
+async def complete_task(db: AsyncSession, task_id: int, user_id: int):
+    """Marks a task owned by the user as completed in a single statement.
+
+    Returns:
+        Row: The updated task.
+    """
+    return await _run_write(db, crud.complete_task, task_id, user_id)
+
+
+async def delete_task(db: AsyncSession, task_id: int, user_id: int):
+    """Deletes a task owned by the user in a single statement.
+
+    Returns:
+        int: The ID of the deleted task.
+    """
+    return await _run_write(db, crud.delete_task, task_id, user_id)
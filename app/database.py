@@ -1,7 +1,14 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
+from typing import Optional
+import itertools
 import os
+import threading
+import time
+from .cache import TTLCache
 
 load_dotenv()
 
@@ -11,15 +18,165 @@ POSTGRES_HOST = os.getenv("POSTGRES_HOST")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT")
 POSTGRES_DB = os.getenv("POSTGRES_DB")
 
+# connections per worker = DB_POOL_SIZE + DB_MAX_OVERFLOW (see README)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_USE_LIFO = os.getenv("DB_POOL_USE_LIFO", "false").lower() == "true"
+# the /async endpoints have a pool of their own, on top of the one above
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", DB_POOL_SIZE))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", DB_MAX_OVERFLOW))
+
+# comma-separated SQLAlchemy URLs of read replicas; empty means primary only
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+REPLICA_STICKY_MAX_CLIENTS = int(os.getenv("REPLICA_STICKY_MAX_CLIENTS", 10000))
+
 SQLALCHEMY_DATABASE_URL = (
     f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@"
     f"{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 )
+ASYNC_SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace(
+    "postgresql://", "postgresql+asyncpg://", 1
+)
 
 if not all([POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB]):
     raise ValueError("One or more database environment variables are not set.")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+class InstrumentedQueuePool(QueuePool):
+    """A QueuePool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.timeouts += timed_out
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def stats(self) -> dict:
+        """Reports connections in use and checkout wait times.
+
+        Returns:
+            dict: Pool gauges and counters, wait times in seconds.
+        """
+        with self._stats_lock:
+            return {
+                "size": self.size(),
+                "max_overflow": self._max_overflow,
+                "in_use": self.checkedout(),
+                "idle": self.checkedin(),
+                "overflow": self.overflow(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg": self.wait_total / (self.checkouts or 1),
+                "wait_max": self.wait_max,
+            }
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """The asyncio flavour of `InstrumentedQueuePool`, for `async_engine`."""
+
+
+class ReplicaRouter:
+    """Picks a read replica for read-only sessions in round-robin order.
+
+    Clients that committed a write within the last `sticky_seconds` keep
+    reading from the primary so they always see their own writes.
+    """
+
+    def __init__(self, session_factories: list, sticky_seconds: float, max_clients: int):
+        self.session_factories = session_factories
+        self._cycle = itertools.cycle(session_factories)
+        self._cycle_lock = threading.Lock()
+        self._recent_writers = TTLCache(maxsize=max_clients, ttl=sticky_seconds)
+
+    def record_write(self, client_key: Optional[str]) -> None:
+        """Pins the client to the primary for the sticky window.
+
+        Returns:
+            None
+        """
+        if client_key and self.session_factories:
+            self._recent_writers.set(client_key, True)
+
+    def session_factory(self, client_key: Optional[str]):
+        """Chooses where the client's next read should go.
+
+        Returns:
+            sessionmaker or None: A replica session factory, or None for the primary.
+        """
+        if not self.session_factories:
+            return None
+        if client_key and self._recent_writers.get(client_key):
+            return None
+        with self._cycle_lock:
+            return next(self._cycle)
+
+
+def _create_engine(url: str):
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_use_lifo=DB_POOL_USE_LIFO,
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_committed(session):
+    # lets deps.get_db tell write requests apart for replica stickiness
+    session.info["committed"] = True
+
+
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+replica_engines = [_create_engine(url) for url in DATABASE_REPLICA_URLS]
+replica_router = ReplicaRouter(
+    [sessionmaker(autocommit=False, autoflush=False, bind=e) for e in replica_engines],
+    sticky_seconds=REPLICA_STICKY_SECONDS,
+    max_clients=REPLICA_STICKY_MAX_CLIENTS,
+)
+
+# native asyncio driver for the /async endpoints
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=DB_ASYNC_POOL_SIZE,
+    max_overflow=DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    pool_use_lifo=DB_POOL_USE_LIFO,
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+Base = declarative_base()
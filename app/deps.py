@@ -1,7 +1,9 @@
+from fastapi import Depends, Request
 from sqlalchemy.orm import Session
-from .database import SessionLocal
+from . import database
+from .database import SessionLocal, AsyncSessionLocal
 
-def get_db():
+def get_db(request: Request):
     """Provides a database session for dependency injection.
 
     Yields:
@@ -11,4 +13,36 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        if db.info.get("committed"):
+            database.replica_router.record_write(request.headers.get("Authorization"))
+        db.close()
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """Provides a session for read-only endpoints, on a replica when configured.
+
+    Falls back to the primary session when no replicas are configured or the
+    client wrote recently (read-your-writes).
+
+    Yields:
+        Session: A SQLAlchemy database session.
+    """
+    factory = database.replica_router.session_factory(request.headers.get("Authorization"))
+    if factory is None:
+        yield db
+        return
+    replica_db = factory()
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+
+
+async def get_async_db():
+    """Provides an async database session for dependency injection.
+
+    Yields:
+        AsyncSession: A SQLAlchemy asyncio database session.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
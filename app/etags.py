@@ -0,0 +1,101 @@
+from fastapi import Request, Response
+from typing import List, Optional
+import hashlib
+import re
+from . import negotiation
+
+# Task ETags are "<id>-<version>", plus "-msgpack" for MessagePack bodies;
+# `version` grows on every write to the task. CompressionMiddleware sends
+# them weak (W/) on compressed responses.
+_TASK_ETAG = re.compile(r'(?:W/)?"(\d+)-(\d+)(?:-msgpack)?"')
+
+
+def _format_suffix() -> str:
+    # JSON and MessagePack bodies of one URL are different representations
+    # (responses vary on Accept), so they must not share a strong ETag
+    return "-msgpack" if negotiation.wants_msgpack.get() else ""
+
+
+def task_etag(task) -> str:
+    """Builds the ETag of a task row that includes `version`, per response format.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    return f'"{task.id}-{task.version}{_format_suffix()}"'
+
+
+def page_etag(tasks: list, total: Optional[int], has_more: bool) -> str:
+    """Builds the ETag of a page from its tasks' IDs and versions and the total, per response format.
+
+    Every task on the page is hashed, not only the highest version: editing
+    an older task leaves the maximum unchanged but must change the page.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for task in tasks:
+        digest.update(f"{task.id}-{task.version},".encode())
+    digest.update(f"{total};{has_more}".encode())
+    return f'"{digest.hexdigest()}{_format_suffix()}"'
+
+
+def _tags(header: str) -> List[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(request: Request, etag: str) -> bool:
+    """Checks `If-None-Match` against an ETag (weak comparison).
+
+    Returns:
+        bool: True if the client's copy is current and 304 can be sent.
+    """
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = _tags(header)
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+def not_modified(etag: str) -> Response:
+    """Builds an empty 304 response.
+
+    Returns:
+        Response: The 304 response carrying the ETag.
+    """
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def tagged(response: Response, etag: str) -> Response:
+    """Sets the ETag header on a response.
+
+    Returns:
+        Response: The same response.
+    """
+    response.headers["ETag"] = etag
+    return response
+
+
+def match_versions(if_match: Optional[str], task_id: int) -> Optional[List[int]]:
+    """Reads the versions of a task that an `If-Match` header accepts.
+
+    Only ETags of that task can match, in either format; anything else yields
+    no versions, so the write fails its precondition. Their weak form is
+    accepted too: it only marks a compressed response, and the version
+    still identifies the task exactly.
+
+    Returns:
+        list or None: The accepted versions, None without a header or for `*`.
+    """
+    if if_match is None:
+        return None
+    tags = _tags(if_match)
+    if "*" in tags:
+        return None
+    versions = []
+    for tag in tags:
+        match = _TASK_ETAG.fullmatch(tag)
+        if match and int(match[1]) == task_id:
+            versions.append(int(match[2]))
+    return versions
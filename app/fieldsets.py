@@ -0,0 +1,68 @@
+from fastapi import HTTPException, Response
+from pydantic import ConfigDict, create_model
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from . import negotiation, schemas
+
+# response field order of schemas.Task, which matches the tasks columns
+TASK_FIELDS = tuple(schemas.Task.model_fields)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parses a `?fields=` list of task fields.
+
+    `id` is always included, since cursors and clients key on it.
+
+    Returns:
+        tuple or None: The fields in response order, or None for all fields.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested - set(TASK_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}!"
+        )
+    requested.add("id")
+    return tuple(name for name in TASK_FIELDS if name in requested)
+
+
+@lru_cache(maxsize=None)
+def task_model(fields: Tuple[str, ...]) -> type:
+    """Builds (once per field set) a `schemas.Task` trimmed to `fields`.
+
+    Returns:
+        type: A pydantic model with only those fields.
+    """
+    return create_model(
+        f"Task_{'_'.join(fields)}",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schemas.Task.model_fields[name].annotation, ...) for name in fields},
+    )
+
+
+@lru_cache(maxsize=None)
+def page_model(fields: Tuple[str, ...]) -> type:
+    """Builds (once per field set) a `schemas.PaginatedTasks` of trimmed tasks.
+
+    Returns:
+        type: A pydantic model for a page of trimmed tasks.
+    """
+    return create_model(
+        f"PaginatedTasks_{'_'.join(fields)}",
+        __base__=schemas.PaginatedTasks,
+        items=(List[task_model(fields)], ...),
+    )
+
+
+def render(model: type, content) -> Response:
+    """Validates and serializes content with a trimmed model.
+
+    Returns:
+        Response: The JSON (or MessagePack) response.
+    """
+    validated = model.model_validate(content)
+    return negotiation.render(
+        lambda: validated.model_dump(mode="json"), validated.model_dump_json
+    )
@@ -1,23 +1,31 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from jose import jwt, JWTError, ExpiredSignatureError
 from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from datetime import timedelta
 from typing import Optional
-from . import schemas, crud, auth
-from .deps import get_db
-from .database import engine, Base
+from . import schemas, crud, auth, passwords, manage, async_api, bulk, compression, etags, fieldsets, negotiation, serialization
+from .deps import get_db, get_read_db
+from .pagination import encode_cursor, decode_cursor
+from .database import engine, async_engine, replica_engines
 from .models import User, Task
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events."""
-    # at startup create database tables
-    Base.metadata.create_all(bind=engine)
+    # at startup create database tables and add any new columns
+    manage.migrate(engine)
     yield
+    passwords.executor.shutdown()
+    await async_engine.dispose()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=negotiation.NegotiatedResponse)
+app.router.route_class = negotiation.MsgpackRoute
+app.include_router(async_api.router)
+app.add_middleware(compression.CompressionMiddleware)
 
 @app.get("/")
 def read_root():
@@ -29,26 +37,56 @@ def read_root():
     return {"message": "Welcome to ToDo API"}
 
 
+@app.get("/metrics")
+def read_metrics():
+    """Returns in-process performance counters.
+
+    Returns:
+        dict: Counters grouped by component.
+    """
+    return {
+        "user_cache": auth.user_cache.stats(),
+        "password_executor": passwords.executor.stats(),
+        "db_pool": engine.pool.stats(),
+        "db_replica_pools": [e.pool.stats() for e in replica_engines],
+        "db_async_pool": async_engine.pool.stats(),
+        "task_cache": crud.task_cache.stats(),
+        "compression": compression.stats(),
+    }
+
+
 @app.post("/users/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     """Creates a new user.
 
     Returns:
         User: The created user object.
     """
-    db_user = crud.get_user_by_username(db, username=user.username)
+    db_user = await run_in_threadpool(crud.get_user_by_username, db, username=user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered!")
-    return crud.create_user(db=db, user=user)
+    hashed_password = await passwords.hash_password(user.password)
+    return await run_in_threadpool(
+        crud.create_user, db=db, user=user, hashed_password=hashed_password
+    )
+
+
+def _purge_user(bind, user_id: int):
+    with Session(bind=bind) as db:
+        crud.purge_user(db, user_id)
 
 
 @app.delete("/users/me", response_model=None)
 def delete_user(
+    background_tasks: BackgroundTasks,
     token: str = Depends(auth.oauth2_scheme),
     db: Session = Depends(get_db),
 ):
     """Deletes the authenticated user's account.
 
+    Accounts with more than `USER_PURGE_THRESHOLD` tasks are locked at once
+    and purged in batches after the response, which is then 202 Accepted.
+
     Returns:
         None
     """
@@ -70,12 +108,16 @@ def delete_user(
         )
     except JWTError:
         raise credentials_exception
+    if crud.count_tasks(db, user_id=user_id) > crud.USER_PURGE_THRESHOLD:
+        crud.deactivate_user(db=db, user_id=user_id)
+        background_tasks.add_task(_purge_user, db.get_bind(), user_id)
+        return Response(status_code=status.HTTP_202_ACCEPTED)
     crud.delete_user(db=db, user_id=user_id)
     return None
 
 
 @app.post("/token", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
     """Authenticates a user and returns a JWT token.
@@ -83,7 +125,7 @@ def login_for_access_token(
     Returns:
         dict: JWT access token and token type.
     """
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -92,7 +134,9 @@ def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
-        data={"sub": user.username, "user_id": user.id}, expires_delta=access_token_expires
+        data={"sub": user.username, "user_id": user.id},
+        expires_delta=access_token_expires,
+        user=user,
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -111,144 +155,454 @@ def create_task(
     return crud.create_task(db=db, task=task, user_id=current_user.id)
 
 
-@app.get("/tasks/", response_model=schemas.PaginatedTasks)
-def read_tasks(
-    skip: int = 0,
-    limit: int = 10,
-    status: Optional[schemas.TaskStatus] = None,
+@app.post("/tasks/bulk", response_model=schemas.BulkTasksResult)
+async def create_tasks(
+    request: Request,
     db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user),
 ):
-    """Retrieves a paginated list of tasks with optional status filter.
+    """Creates many tasks for the authenticated user in one transaction.
+
+    Accepts a JSON array or NDJSON (`application/x-ndjson`) of tasks. Invalid
+    items are reported per item and the valid ones are still created.
+
+    Returns:
+        dict: Created and failed counts with a result per item.
+    """
+    items = await bulk.read_items(request)
+    valid, failed = bulk.validate_tasks(items)
+    ids = await run_in_threadpool(
+        crud.create_tasks, db, [task for _, task in valid], current_user.id
+    )
+    results = failed + [{"index": index, "id": id} for (index, _), id in zip(valid, ids)]
+    results.sort(key=lambda result: result["index"])
+    return {"created": len(ids), "failed": len(failed), "results": results}
+
+
+@app.post("/tasks/import", response_model=schemas.TaskImportResult)
+async def import_tasks(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user),
+):
+    """Imports an NDJSON or CSV upload of tasks for the authenticated user.
+
+    The body is parsed and validated while it streams, and each chunk is
+    committed as soon as it is written, so no transaction (nor the counter
+    rows it locks) stays open while waiting for the client to send more.
+    Invalid rows are skipped and reported.
+
+    Returns:
+        dict: Import summary with rejected line numbers and rows per second.
+    """
+    # end the transaction of the user lookup before reading the body
+    await run_in_threadpool(db.rollback)
+
+    async def write_chunk(tasks: list):
+        return await run_in_threadpool(crud.import_tasks, db, tasks, current_user.id)
+
+    return await bulk.import_tasks(request, write_chunk)
+
+
+def _check_task_update(task: schemas.TaskUpdate):
+    if task.title is not None and (len(task.title.strip()) == 0 or len(task.title) > 100):
+        raise HTTPException(
+            status_code=422, detail="Title must be between 1 and 100 characters!"
+        )
+    if task.description and len(task.description) > 500:
+        raise HTTPException(
+            status_code=422, detail="Description cannot exceed 500 characters!"
+        )
+
+
+def _check_bulk_selection(selection: schemas.BulkTaskSelection):
+    if (selection.ids is None) == (selection.status is None):
+        raise HTTPException(
+            status_code=422, detail="Select tasks by either ids or status!"
+        )
+    if selection.ids is not None:
+        bulk.check_batch_size(len(selection.ids))
+
+
+@app.post("/tasks/bulk/update", response_model=schemas.BulkTaskOperationResult)
+def update_tasks(
+    selection: schemas.BulkTaskUpdate,
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Updates the authenticated user's tasks selected by ids or status.
+
+    Returns:
+        dict: Updated ids plus the requested ids that were missing or not owned.
+    """
+    _check_bulk_selection(selection)
+    _check_task_update(selection.set)
+    values = selection.set.model_dump(exclude_unset=True)
+    if not values:
+        raise HTTPException(status_code=422, detail="No fields to update!")
+    for name, value in values.items():
+        if value is None and not Task.__table__.c[name].nullable:
+            raise HTTPException(status_code=422, detail=f"{name.capitalize()} cannot be null!")
+    return crud.bulk_update_tasks(
+        db, current_user.id, values, ids=selection.ids, status=selection.status
+    )
+
+
+@app.post("/tasks/bulk/complete", response_model=schemas.BulkTaskOperationResult)
+def complete_tasks(
+    selection: schemas.BulkTaskSelection,
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Marks the authenticated user's tasks selected by ids or status as completed.
+
+    Returns:
+        dict: Completed ids plus the requested ids that were missing, not owned or already completed.
+    """
+    _check_bulk_selection(selection)
+    return crud.bulk_complete_tasks(
+        db, current_user.id, ids=selection.ids, status=selection.status
+    )
+
+
+@app.post("/tasks/bulk/delete", response_model=schemas.BulkTaskOperationResult)
+def delete_tasks(
+    selection: schemas.BulkTaskSelection,
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Deletes the authenticated user's tasks selected by ids or status.
+
+    Returns:
+        dict: Deleted ids plus the requested ids that were missing or not owned.
+    """
+    _check_bulk_selection(selection)
+    return crud.bulk_delete_tasks(
+        db, current_user.id, ids=selection.ids, status=selection.status
+    )
+
+
+def _page(tasks: list, total: Optional[int], has_more: bool, skip: int, limit: int):
+    """Builds a page of tasks with the cursor for the page after it.
 
     Returns:
         dict: Paginated tasks and metadata.
     """
+    return {
+        "items": tasks,
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": encode_cursor({"id": tasks[-1].id}) if has_more else None,
+    }
+
+
+def _read_columns(columns: Optional[tuple]) -> tuple:
+    """Adds `version`, which ETags need, to the task columns a read returns.
+
+    Returns:
+        tuple: The columns to select.
+    """
+    return (columns or serialization.TASK_COLUMNS) + ("version",)
+
+
+def _page_response(request: Request, tasks: list, total: Optional[int], has_more: bool, skip: int, limit: int, columns: Optional[tuple]) -> Response:
+    """Serializes a page of task rows under its ETag, or answers 304.
+
+    Returns:
+        Response: The page, trimmed to `columns` if given, or 304 Not Modified.
+    """
+    etag = etags.page_etag(tasks, total, has_more)
+    if etags.none_match(request, etag):
+        return etags.not_modified(etag)
+    page = _page(tasks, total, has_more, skip, limit)
+    if columns is not None:
+        response = fieldsets.render(fieldsets.page_model(columns), page)
+    else:
+        response = serialization.page_response(page)
+    return etags.tagged(response, etag)
+
+
+def _check_pagination(skip: int, limit: int, cursor: Optional[str]):
     if skip < 0:
         raise HTTPException(status_code=400, detail="Skip must be non-negative!")
     if limit <= 0 or limit > 100:
         raise HTTPException(
             status_code=400, detail="Limit must be between 1 and 100 (inclusive)!"
         )
-    tasks, total = crud.get_tasks(db, skip=skip, limit=limit, status=status)
-    if skip > 0 and skip >= total:
+    if cursor is not None and skip > 0:
+        raise HTTPException(status_code=400, detail="Skip cannot be combined with cursor!")
+
+
+@app.get("/tasks/", response_model=schemas.PaginatedTasks)
+def read_tasks(
+    request: Request,
+    skip: int = 0,
+    limit: int = 10,
+    status: Optional[schemas.TaskStatus] = None,
+    cursor: Optional[str] = None,
+    total_mode: schemas.TotalMode = Query(schemas.TotalMode.EXACT, alias="total"),
+    fields: Optional[str] = Query(None, description="Comma-separated task fields to return; `id` is always included."),
+    db: Session = Depends(get_read_db),
+):
+    """Retrieves a paginated list of tasks with optional status filter.
+
+    Pages either by `skip` or, for constant-time deep pages, by the
+    `cursor` returned as `next_cursor` of the previous page. `total` picks
+    an exact, approximate or omitted total count; exact sums the counter
+    rows of every user, so it costs one row per user. `fields` trims each task
+    to the named fields, and only those columns are read. The page carries
+    an ETag, and a matching `If-None-Match` gets 304 without a body.
+
+    Returns:
+        dict: Paginated tasks and metadata.
+    """
+    _check_pagination(skip, limit, cursor)
+    columns = fieldsets.parse_fields(fields)
+    after_id = decode_cursor(cursor, id=int)["id"] if cursor else None
+    tasks, total, has_more = crud.get_tasks(
+        db, skip=skip, limit=limit, status=status, after_id=after_id,
+        total_mode=total_mode, columns=_read_columns(columns),
+    )
+    if skip > 0 and total_mode == schemas.TotalMode.EXACT and skip >= total:
         raise HTTPException(
             status_code=400, detail=f"Skip value {skip} exceeds total tasks {total}"
         )
-    return {"items": tasks, "total": total, "skip": skip, "limit": limit}
+    return _page_response(request, tasks, total, has_more, skip, limit, columns)
 
 
 @app.get("/tasks/user/", response_model=schemas.PaginatedTasks)
 def read_user_tasks(
+    request: Request,
     skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    total_mode: schemas.TotalMode = Query(schemas.TotalMode.EXACT, alias="total"),
+    fields: Optional[str] = Query(None, description="Comma-separated task fields to return; `id` is always included."),
     current_user: schemas.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Retrieves a paginated list of tasks for the authenticated user.
 
+    Pages either by `skip` or, for constant-time deep pages, by the
+    `cursor` returned as `next_cursor` of the previous page. `total` picks
+    an exact, approximate or omitted total count. `fields` trims each task
+    to the named fields, and only those columns are read. The page carries
+    an ETag, and a matching `If-None-Match` gets 304 without a body.
+
     Returns:
         dict: Paginated user tasks and metadata.
     """
-    if skip < 0:
-        raise HTTPException(status_code=400, detail="Skip must be non-negative!")
-    if limit <= 0 or limit > 100:
-        raise HTTPException(
-            status_code=400, detail="Limit must be between 1 and 100 (inclusive)!"
-        )
-    tasks, total = crud.get_user_tasks(
-        db, user_id=current_user.id, skip=skip, limit=limit
+    _check_pagination(skip, limit, cursor)
+    columns = fieldsets.parse_fields(fields)
+    after_id = decode_cursor(cursor, id=int)["id"] if cursor else None
+    tasks, total, has_more = crud.get_user_tasks(
+        db, user_id=current_user.id, skip=skip, limit=limit, after_id=after_id,
+        total_mode=total_mode, columns=_read_columns(columns),
     )
-    if skip > 0 and skip >= total:
+    if skip > 0 and total_mode == schemas.TotalMode.EXACT and skip >= total:
         raise HTTPException(
             status_code=400,
             detail=f"Skip value {skip} exceeds total user tasks {total}",
         )
-    return {"items": tasks, "total": total, "skip": skip, "limit": limit}
+    return _page_response(request, tasks, total, has_more, skip, limit, columns)
+
+
+@app.get("/tasks/user/stats", response_model=schemas.TaskStats)
+def read_user_task_stats(
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Returns the authenticated user's task counts by status.
+
+    The counts come from the `task_counters` summary rows, which database
+    triggers update in the same transaction as every task write.
+
+    Returns:
+        dict: The count per status and the total.
+    """
+    return crud.get_task_stats(db, user_id=current_user.id)
+
+
+@app.get("/tasks/user/search", response_model=schemas.PaginatedTasks)
+def search_user_tasks(
+    q: str = Query(..., max_length=200),
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Full-text searches the authenticated user's tasks, best matches first.
+
+    Pages by the `cursor` returned as `next_cursor`; `total` is not computed.
+
+    Returns:
+        dict: Matching tasks and pagination metadata.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query cannot be empty!")
+    _check_pagination(0, limit, cursor)
+    after = None
+    if cursor:
+        position = decode_cursor(cursor, score=(int, float), id=int)
+        after = (position["score"], position["id"])
+    tasks, has_more = crud.search_user_tasks(
+        db, user_id=current_user.id, q=q, limit=limit, after=after
+    )
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor({"score": tasks[-1].score, "id": tasks[-1].id})
+    return {
+        "items": tasks,
+        "total": None,
+        "skip": 0,
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+    }
+
+
+_EXPORT_MEDIA_TYPES = {
+    schemas.ExportFormat.NDJSON: "application/x-ndjson",
+    schemas.ExportFormat.CSV: "text/csv",
+}
+
+
+@app.get("/tasks/user/export", response_class=StreamingResponse)
+def export_user_tasks(
+    format: schemas.ExportFormat = schemas.ExportFormat.NDJSON,
+    current_user: schemas.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Streams all of the authenticated user's tasks as NDJSON or CSV.
+
+    Rows are read from a server-side cursor and sent batch by batch, so
+    memory use does not grow with the number of tasks.
+
+    Returns:
+        StreamingResponse: The tasks in ID order.
+    """
+    # the request's session is closed before the body streams, so the
+    # export opens its own on the same database
+    bind = db.get_bind()
+    user_id = current_user.id
+
+    def batches():
+        with Session(bind=bind) as export_db:
+            yield from crud.iter_user_tasks(
+                export_db, user_id, batch_size=bulk.TASK_EXPORT_BATCH_SIZE
+            )
+
+    encode = bulk.export_csv if format == schemas.ExportFormat.CSV else bulk.export_ndjson
+    return StreamingResponse(
+        encode(batches()),
+        media_type=_EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'},
+    )
 
 
 @app.get("/tasks/{task_id}", response_model=schemas.Task)
-def read_task(task_id: int, db: Session = Depends(get_db)):
-    """Retrieves a task by its ID.
+def read_task(
+    task_id: int,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated task fields to return; `id` is always included."),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+):
+    """Retrieves a task by its ID, trimmed to `fields` if given.
+
+    The task is read through the task cache, whose misses load from the
+    primary: a lagging replica would cache an outdated task for every client.
+    Without the cache only the requested columns are read, from a replica.
+    The task carries an ETag, and a matching `If-None-Match` gets 304
+    without a body.
 
     Returns:
         Task: The task object.
     """
-    db_task = crud.get_task(db, task_id=task_id)
+    columns = fieldsets.parse_fields(fields)
+    if crud.task_cache.enabled:
+        db_task = crud.get_cached_task(db, task_id=task_id)
+    else:
+        db_task = crud.get_task(read_db, task_id=task_id, columns=_read_columns(columns))
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found!")
-    return db_task
+    etag = etags.task_etag(db_task)
+    if etags.none_match(request, etag):
+        return etags.not_modified(etag)
+    if columns is not None:
+        response = fieldsets.render(fieldsets.task_model(columns), db_task)
+    else:
+        response = serialization.task_response(db_task)
+    return etags.tagged(response, etag)
 
 
 @app.put("/tasks/{task_id}", response_model=schemas.Task)
 def update_task(
     task_id: int,
     task: schemas.TaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: schemas.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db),
 ):
     """Updates a task for the authenticated user.
 
+    With `If-Match`, the task is only updated if its ETag matches (412
+    otherwise), instead of the last write winning.
+
     Returns:
         Task: The updated task object.
     """
-    db_task = crud.get_task(db, task_id=task_id)
-    if not db_task:
-        raise HTTPException(status_code=404, detail="Task not found!")
-    if db_task.user_id != current_user.id:
-        raise HTTPException(
-            status_code=403, detail="Not authorized to update this task!"
-        )
-    if task.model_dump(exclude_unset=True) == {}:
-        return db_task
-    if task.title and (len(task.title.strip()) == 0 or len(task.title) > 100):
-        raise HTTPException(
-            status_code=422, detail="Title must be between 1 and 100 characters!"
-        )
-    if task.description and len(task.description) > 500:
-        raise HTTPException(
-            status_code=422, detail="Description cannot exceed 500 characters!"
-        )
-    return crud.update_task(db=db, task_id=task_id, task=task)
+    _check_task_update(task)
+    db_task = crud.update_task(
+        db=db, task_id=task_id, task=task, user_id=current_user.id,
+        versions=etags.match_versions(if_match, task_id),
+    )
+    etags.tagged(response, etags.task_etag(db_task))
+    return db_task
 
 
 @app.patch("/tasks/{task_id}/complete", response_model=schemas.Task)
 def complete_task(
     task_id: int,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: schemas.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db),
 ):
     """Marks a task as completed for the authenticated user.
 
+    `If-Match` works as for `PUT /tasks/{task_id}`.
+
     Returns:
         Task: The updated task object.
     """
-    db_task = crud.get_task(db, task_id=task_id)
-    if db_task is None:
-        raise HTTPException(status_code=404, detail="Task not found!")
-    if db_task.user_id != current_user.id:
-        raise HTTPException(
-            status_code=403, detail="Not authorized to update this task!"
-        )
-    return crud.complete_task(db=db, task_id=task_id)
+    db_task = crud.complete_task(
+        db=db, task_id=task_id, user_id=current_user.id,
+        versions=etags.match_versions(if_match, task_id),
+    )
+    etags.tagged(response, etags.task_etag(db_task))
+    return db_task
 
 
 @app.delete("/tasks/{task_id}", response_model=None)
 def delete_task(
     task_id: int,
+    if_match: Optional[str] = Header(None),
     current_user: schemas.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db),
 ):
     """Deletes a task for the authenticated user.
 
+    `If-Match` works as for `PUT /tasks/{task_id}`.
+
     Returns:
         None
     """
-    db_task = crud.get_task(db, task_id=task_id)
-    if db_task is None:
-        raise HTTPException(status_code=404, detail="Task not found!")
-    if db_task.user_id != current_user.id:
-        raise HTTPException(
-            status_code=403, detail="Not authorized to delete this task!"
-        )
-    crud.delete_task(db=db, task_id=task_id)
+    crud.delete_task(
+        db=db, task_id=task_id, user_id=current_user.id,
+        versions=etags.match_versions(if_match, task_id),
+    )
     return None
@@ -0,0 +1,190 @@
+from sqlalchemy import delete, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn, CreateIndex
+import argparse
+from .database import engine, Base
+from . import crud, models
+
+
+def add_missing_columns(bind: Engine):
+    """Adds columns that exist on the models but not yet in the database.
+
+    `Base.metadata.create_all` only creates missing tables, so columns added
+    to existing models need an explicit `ALTER TABLE`. New columns must be
+    nullable or carry a server default.
+
+    Returns:
+        list: The `table.column` names that were added.
+    """
+    added = []
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        preparer = connection.dialect.identifier_preparer
+        if_not_exists = "IF NOT EXISTS " if connection.dialect.name == "postgresql" else ""
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {if_not_exists}{column_ddl}"
+                )
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def create_missing_indexes(bind: Engine):
+    """Creates model indexes that are missing from existing tables.
+
+    On PostgreSQL indexes are built `CONCURRENTLY`, so writes to the table
+    continue during the build. This can take a while on large tables, which
+    is why it is a separate command rather than part of startup.
+
+    Returns:
+        list: The names of the created indexes.
+    """
+    created = []
+    with bind.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name in existing:
+                    continue
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=connection.dialect))
+                if connection.dialect.name == "postgresql":
+                    ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+                connection.exec_driver_sql(ddl)
+                created.append(index.name)
+    return created
+
+
+def create_search_index(bind: Engine):
+    """Adds full-text search to a tasks table that predates it.
+
+    On PostgreSQL this adds the generated `search_vector` column, which
+    rewrites the table under an exclusive lock, then builds its GIN index
+    concurrently. On SQLite it creates and fills the FTS5 table.
+
+    Returns:
+        bool: True if search had to be added.
+    """
+    with bind.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        inspector = inspect(connection)
+        if not inspector.has_table("tasks"):
+            return False
+        if connection.dialect.name == "postgresql":
+            columns = {column["name"] for column in inspector.get_columns("tasks")}
+            indexes = {index["name"] for index in inspector.get_indexes("tasks")}
+            if "search_vector" in columns and "ix_tasks_search_vector" in indexes:
+                return False
+            connection.exec_driver_sql(models.POSTGRES_SEARCH_COLUMN)
+            connection.exec_driver_sql(
+                models.POSTGRES_SEARCH_INDEX.format(concurrently="CONCURRENTLY ")
+            )
+            return True
+        if connection.dialect.name == "sqlite":
+            if inspector.has_table("tasks_fts"):
+                return False
+            for ddl in models.SQLITE_SEARCH_DDL:
+                connection.exec_driver_sql(ddl)
+            connection.exec_driver_sql("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+            return True
+    return False
+
+
+def drop_global_task_counters(bind: Engine):
+    """Removes the all-users counter rows kept by older versions.
+
+    Those rows (`user_id` 0) were locked by every task write. PostgreSQL's
+    trigger function is replaced by `create_all`; SQLite triggers that still
+    maintain the rows are recreated here.
+
+    Returns:
+        bool: True if anything had to change.
+    """
+    with bind.begin() as connection:
+        changed = connection.execute(
+            delete(models.TaskCounter).where(models.TaskCounter.user_id == 0)
+        ).rowcount > 0
+        if connection.dialect.name == "sqlite":
+            outdated = [
+                name for name, sql in connection.exec_driver_sql(
+                    "SELECT name, sql FROM sqlite_master "
+                    "WHERE type = 'trigger' AND name LIKE 'task_counters_%'"
+                )
+                if "(0, NEW.status, 1)" in sql
+            ]
+            for name in outdated:
+                connection.exec_driver_sql(f"DROP TRIGGER {name}")
+            if outdated:
+                for ddl in models.SQLITE_COUNTER_TRIGGERS:
+                    connection.exec_driver_sql(ddl)
+                changed = True
+    return changed
+
+
+def migrate(bind: Engine = engine):
+    """Brings an existing database up to date with the models.
+
+    Returns:
+        list: The `table.column` names that were added.
+    """
+    Base.metadata.create_all(bind=bind)
+    added = add_missing_columns(bind)
+    drop_global_task_counters(bind)
+    return added
+
+
+def main(argv=None):
+    """Runs a maintenance command, e.g. `python -m app.manage migrate`.
+
+    Returns:
+        int: The process exit code.
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="create missing tables and columns")
+    commands.add_parser("create-indexes", help="build missing indexes on existing tables")
+    commands.add_parser("purge-users", help="finish interrupted background account deletions")
+    commands.add_parser("verify-counters", help="report task counters that differ from the tasks table")
+    commands.add_parser("rebuild-counters", help="recompute every task counter from the tasks table")
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        added = migrate()
+        print(f"Added columns: {', '.join(added) or 'none'}")
+    elif args.command == "create-indexes":
+        created = create_missing_indexes(engine)
+        print(f"Created indexes: {', '.join(created) or 'none'}")
+        if create_search_index(engine):
+            print("Added full-text search")
+    elif args.command == "purge-users":
+        with Session(bind=engine) as db:
+            purged = crud.purge_inactive_users(db)
+        print(f"Purged users: {', '.join(map(str, purged)) or 'none'}")
+    elif args.command == "verify-counters":
+        with Session(bind=engine) as db:
+            drift = crud.verify_task_counters(db)
+        for row in drift:
+            print(f"user {row['user_id']} {row['status']}: counted {row['counted']}, actual {row['actual']}")
+        print(f"Drifted counters: {len(drift)}")
+        return 1 if drift else 0
+    elif args.command == "rebuild-counters":
+        with Session(bind=engine) as db:
+            crud.rebuild_task_counters(db)
+        print("Rebuilt task counters")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
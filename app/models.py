@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Enum, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, Boolean, String, Text, Enum, ForeignKey, Index, DDL, event, true
 from sqlalchemy.orm import relationship
 from .database import Base
 import enum
@@ -18,9 +18,14 @@ class User(Base):
     last_name = Column(Text, nullable=True)
     username = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # False while a large account's tasks are purged in the background
+    is_active = Column(Boolean, nullable=False, default=True, server_default=true())
 
+    # tasks are removed by the ON DELETE CASCADE foreign key, not loaded and
+    # deleted one by one
     tasks = relationship("Task", back_populates="owner",
-                         cascade="all, delete-orphan")
+                         cascade="all, delete-orphan", passive_deletes=True)
 
 
 class Task(Base):
@@ -32,5 +37,192 @@ class Task(Base):
     status = Column(Enum(TaskStatus), default=TaskStatus.NEW, nullable=False)
     user_id = Column(Integer, ForeignKey(
         "users.id", ondelete="CASCADE"), nullable=False)
+    # bumped by every update in crud; ETags and If-Match are built from it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     owner = relationship("User", back_populates="tasks")
+
+    # match the list queries: a user's tasks by id, optionally per status,
+    # and all tasks of one status by id (keyset pagination orders by id)
+    __table_args__ = (
+        Index("ix_tasks_user_id_id", "user_id", "id"),
+        Index("ix_tasks_user_id_status_id", "user_id", "status", "id"),
+        Index("ix_tasks_status_id", "status", "id"),
+    )
+
+
+class TaskCounter(Base):
+    """Task counts per user and status, kept in step with `tasks` by triggers.
+
+    Counts across all users are summed from these rows on read: a shared
+    row would be locked by every task write until its transaction commits.
+    """
+    __tablename__ = "task_counters"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    status = Column(Enum(TaskStatus), primary_key=True)
+    task_count = Column(BigInteger, nullable=False, default=0)
+
+
+# The triggers run inside the statement that changes `tasks`, so counters are
+# updated in the same transaction as every write, including set-based and
+# cascading ones. PostgreSQL uses statement-level triggers over transition
+# tables so bulk writes touch each counter row once, in a fixed lock order.
+_POSTGRES_COUNTER_FUNCTION = """
+CREATE OR REPLACE FUNCTION task_counters_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE task_counters c SET task_count = c.task_count - d.n
+        FROM (
+            SELECT user_id, status, count(*) AS n FROM old_rows GROUP BY user_id, status
+        ) d
+        WHERE c.user_id = d.user_id AND c.status = d.status;
+    ELSIF TG_OP = 'INSERT' THEN
+        INSERT INTO task_counters (user_id, status, task_count)
+        SELECT user_id, status, count(*) FROM new_rows
+        GROUP BY user_id, status
+        ORDER BY user_id, status
+        ON CONFLICT (user_id, status)
+        DO UPDATE SET task_count = task_counters.task_count + EXCLUDED.task_count;
+    ELSE
+        INSERT INTO task_counters (user_id, status, task_count)
+        SELECT user_id, status, sum(n) FROM (
+            SELECT user_id, status, -1 AS n FROM old_rows
+            UNION ALL SELECT user_id, status, 1 FROM new_rows
+        ) d
+        GROUP BY user_id, status
+        HAVING sum(n) <> 0
+        ORDER BY user_id, status
+        ON CONFLICT (user_id, status)
+        DO UPDATE SET task_count = task_counters.task_count + EXCLUDED.task_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+_POSTGRES_COUNTER_TRIGGER = """
+DO $$ BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'task_counters_{name}') THEN
+        CREATE TRIGGER task_counters_{name} AFTER {event} ON tasks
+        REFERENCING {tables}
+        FOR EACH STATEMENT EXECUTE FUNCTION task_counters_apply();
+    END IF;
+END $$
+"""
+
+SQLITE_COUNTER_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS task_counters_insert AFTER INSERT ON tasks
+    BEGIN
+        INSERT INTO task_counters (user_id, status, task_count)
+        VALUES (NEW.user_id, NEW.status, 1)
+        ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_counters_delete AFTER DELETE ON tasks
+    BEGIN
+        UPDATE task_counters SET task_count = task_count - 1
+        WHERE user_id = OLD.user_id AND status = OLD.status;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS task_counters_update AFTER UPDATE OF status, user_id ON tasks
+    WHEN OLD.status IS NOT NEW.status OR OLD.user_id IS NOT NEW.user_id
+    BEGIN
+        UPDATE task_counters SET task_count = task_count - 1
+        WHERE user_id = OLD.user_id AND status = OLD.status;
+        INSERT INTO task_counters (user_id, status, task_count)
+        VALUES (NEW.user_id, NEW.status, 1)
+        ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_count + 1;
+    END
+    """,
+]
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(_POSTGRES_COUNTER_FUNCTION).execute_if(dialect="postgresql"),
+)
+for _event, _tables in (
+    ("INSERT", "NEW TABLE AS new_rows"),
+    ("DELETE", "OLD TABLE AS old_rows"),
+    ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+):
+    event.listen(
+        Base.metadata,
+        "after_create",
+        DDL(_POSTGRES_COUNTER_TRIGGER.format(
+            name=_event.lower(), event=_event, tables=_tables
+        ))
+        .execute_if(dialect="postgresql"),
+    )
+for _trigger in SQLITE_COUNTER_TRIGGERS:
+    event.listen(Base.metadata, "after_create", DDL(_trigger).execute_if(dialect="sqlite"))
+
+
+# Full-text search over title and description. PostgreSQL keeps a generated
+# tsvector column with a GIN index; SQLite keeps an external-content FTS5
+# table in step with triggers. Both are created with the tasks table; existing
+# databases get them from `python -m app.manage create-indexes`.
+SEARCH_CONFIG = "english"
+
+POSTGRES_SEARCH_COLUMN = f"""
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+GENERATED ALWAYS AS (
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+) STORED
+"""
+
+POSTGRES_SEARCH_INDEX = "CREATE INDEX {concurrently}IF NOT EXISTS ix_tasks_search_vector ON tasks USING GIN (search_vector)"
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts
+    USING fts5(title, description, content='tasks', content_rowid='id', tokenize='porter unicode61')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks
+    BEGIN
+        INSERT INTO tasks_fts (rowid, title, description)
+        VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks
+    BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks
+    BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO tasks_fts (rowid, title, description)
+        VALUES (NEW.id, NEW.title, NEW.description);
+    END
+    """,
+]
+
+event.listen(
+    Task.__table__,
+    "after_create",
+    DDL(POSTGRES_SEARCH_COLUMN).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Task.__table__,
+    "after_create",
+    DDL(POSTGRES_SEARCH_INDEX.format(concurrently="")).execute_if(dialect="postgresql"),
+)
+for _ddl in SQLITE_SEARCH_DDL:
+    event.listen(Task.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+# the FTS5 table is not dropped with tasks and would otherwise keep stale rows
+event.listen(
+    Task.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite"),
+)
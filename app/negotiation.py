@@ -0,0 +1,143 @@
+from contextvars import ContextVar
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from typing import Any, Callable
+import enum
+import msgpack
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# whether the current request's Accept header prefers MessagePack; set by
+# MsgpackRoute and read wherever a response body is encoded
+wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+
+def prefers_msgpack(accept: str) -> bool:
+    """Decides from an `Accept` header whether to answer in MessagePack.
+
+    MessagePack wins with a higher q-value than JSON, or an equal one when
+    JSON is only matched by a wildcard; JSON stays the default otherwise.
+
+    Returns:
+        bool: True to encode the response as MessagePack.
+    """
+    msgpack_quality = json_quality = 0.0
+    json_listed = False
+    for part in accept.lower().split(","):
+        media_type, _, params = part.strip().partition(";")
+        media_type = media_type.strip()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_quality = max(msgpack_quality, quality)
+        elif media_type == "application/json":
+            json_quality, json_listed = max(json_quality, quality), True
+        elif media_type in ("*/*", "application/*") and not json_listed:
+            json_quality = max(json_quality, quality)
+    if msgpack_quality > json_quality:
+        return True
+    return msgpack_quality > 0 and msgpack_quality == json_quality and not json_listed
+
+
+def is_msgpack(content_type: str) -> bool:
+    """Checks whether a `Content-Type` header denotes MessagePack.
+
+    Returns:
+        bool: True for MessagePack bodies.
+    """
+    return content_type.split(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+
+def _pack_default(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Cannot pack {type(value).__name__}")
+
+
+def packb(content: Any) -> bytes:
+    """Packs JSON-compatible content, plus enums by value, as MessagePack.
+
+    Returns:
+        bytes: The MessagePack encoding.
+    """
+    return msgpack.packb(content, default=_pack_default)
+
+
+def render(to_python: Callable[[], Any], to_json: Callable[[], bytes]) -> Response:
+    """Encodes a body in the negotiated format.
+
+    `to_json` produces the JSON bytes and `to_python` the objects
+    MessagePack is packed from (see `packb`), so only the chosen one runs.
+
+    Returns:
+        Response: MessagePack or JSON.
+    """
+    if wants_msgpack.get():
+        return Response(content=packb(to_python()), media_type=MSGPACK_MEDIA_TYPE)
+    return Response(content=to_json(), media_type="application/json")
+
+
+class NegotiatedResponse(JSONResponse):
+    """The default response class: JSON, or MessagePack when the client asks for it."""
+
+    def __init__(self, *args, **kwargs):
+        # set before rendering, which picks the encoding the same way
+        self.msgpack = wants_msgpack.get()
+        if self.msgpack:
+            self.media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(*args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self.msgpack:
+            return packb(content)
+        return super().render(content)
+
+
+class MsgpackRequest(Request):
+    """A request whose MessagePack body is read where FastAPI reads JSON."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            try:
+                self._json = msgpack.unpackb(await self.body())
+            except (ValueError, msgpack.UnpackException):
+                raise HTTPException(status_code=400, detail="Invalid MessagePack body!")
+        return self._json
+
+
+class MsgpackRoute(APIRoute):
+    """Route class negotiating MessagePack for request and response bodies.
+
+    The `Accept` decision is stored in `wants_msgpack` for the response
+    encoders. MessagePack bodies of endpoints with a body model are handed to
+    FastAPI as if they were JSON, so they are validated the same way.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            token = wants_msgpack.set(prefers_msgpack(request.headers.get("accept", "")))
+            try:
+                if self.body_field is not None and is_msgpack(request.headers.get("content-type", "")):
+                    scope = dict(request.scope)
+                    scope["headers"] = [
+                        (name, b"application/json" if name == b"content-type" else value)
+                        for name, value in request.scope["headers"]
+                    ]
+                    request = MsgpackRequest(scope, request.receive)
+                response = await handler(request)
+            finally:
+                wants_msgpack.reset(token)
+            response.headers.add_vary_header("Accept")
+            return response
+
+        return negotiated_handler
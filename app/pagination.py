@@ -0,0 +1,33 @@
+from fastapi import HTTPException
+import base64
+import json
+
+
+def encode_cursor(values: dict) -> str:
+    """Encodes keyset position values into an opaque cursor string.
+
+    Returns:
+        str: A URL-safe cursor.
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, **fields) -> dict:
+    """Decodes a cursor produced by `encode_cursor` and checks its fields.
+
+    Each keyword names a required field and the type(s) its value must have.
+
+    Returns:
+        dict: The keyset position values.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, dict) or any(
+        not isinstance(values.get(key), types) for key, types in fields.items()
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor!")
+    return values
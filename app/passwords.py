@@ -0,0 +1,162 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from typing import Optional
+from dotenv import load_dotenv
+import asyncio
+import os
+import time
+
+load_dotenv()
+
+PASSWORD_EXECUTOR = os.getenv("PASSWORD_EXECUTOR", "process")
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", os.cpu_count() or 1))
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", 64))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _timed_hash(password: str):
+    """Hashes a password inside a worker and measures the CPU-bound part.
+
+    Returns:
+        tuple: The hash, the wall-clock start time and the hashing duration.
+    """
+    started = time.time()
+    hashed = pwd_context.hash(password)
+    return hashed, started, time.time() - started
+
+
+def _timed_verify(plain_password: str, hashed_password: str):
+    """Verifies a password inside a worker and measures the CPU-bound part.
+
+    Returns:
+        tuple: The verification result, the wall-clock start time and the duration.
+    """
+    started = time.time()
+    verified = pwd_context.verify(plain_password, hashed_password)
+    return verified, started, time.time() - started
+
+
+class PasswordExecutor:
+    """A bounded executor that keeps bcrypt work off the request threadpool.
+
+    Uses a process pool so hashing can use several cores, and falls back to
+    a thread pool where processes are unavailable. Once `max_pending` jobs are
+    queued or running, new jobs are rejected with 503 instead of piling up.
+    Only call `run` from the event loop thread.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_pending: int):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                except (OSError, NotImplementedError, ImportError):
+                    self.kind = "thread"
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password"
+                )
+        return self._executor
+
+    async def run(self, fn, *args):
+        """Runs a timed password function on the pool and records its timings.
+
+        Returns:
+            Any: The result of `fn`.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent password operations, please retry!",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        submitted = time.time()
+        try:
+            future = self._get_executor().submit(fn, *args)
+            result, started, elapsed = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # a worker died; start a fresh pool for the next request
+            self._executor = None
+            raise
+        finally:
+            self.pending -= 1
+        queue_wait = max(started - submitted, 0.0)
+        self.completed += 1
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.hash_time_total += elapsed
+        self.hash_time_max = max(self.hash_time_max, elapsed)
+        return result
+
+    def shutdown(self) -> None:
+        """Stops the worker pool, if one was started.
+
+        Returns:
+            None
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """Reports pool saturation and queue-wait versus hash-time figures.
+
+        Returns:
+            dict: Pool settings, counters and timings in seconds.
+        """
+        completed = self.completed or 1
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg": self.queue_wait_total / completed,
+            "queue_wait_max": self.queue_wait_max,
+            "hash_time_avg": self.hash_time_total / completed,
+            "hash_time_max": self.hash_time_max,
+        }
+
+
+executor = PasswordExecutor(
+    kind=PASSWORD_EXECUTOR,
+    max_workers=PASSWORD_WORKERS,
+    max_pending=PASSWORD_MAX_PENDING,
+)
+
+
+async def hash_password(password: str) -> str:
+    """Hashes a password on the password executor.
+
+    Returns:
+        str: The bcrypt hash.
+    """
+    return await executor.run(_timed_hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifies a password on the password executor.
+
+    Returns:
+        bool: True if passwords match, False otherwise.
+    """
+    return await executor.run(_timed_verify, plain_password, hashed_password)
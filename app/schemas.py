@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
+from typing import Dict, Optional, List
 from enum import Enum
 
 
@@ -9,6 +9,17 @@ class TaskStatus(str, Enum):
     COMPLETED = "COMPLETED"
 
 
+class TotalMode(str, Enum):
+    EXACT = "exact"
+    APPROXIMATE = "approximate"
+    NONE = "none"
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class UserBase(BaseModel):
     first_name: str = Field(..., min_length=1)
     last_name: Optional[str] = None
@@ -55,6 +66,54 @@ class Task(TaskBase):
 
 class PaginatedTasks(BaseModel):
     items: List[Task]
-    total: int
+    total: Optional[int]
     skip: int
     limit: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None
+
+
+class TaskStats(BaseModel):
+    by_status: Dict[TaskStatus, int]
+    total: int
+
+
+class BulkTaskResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    errors: Optional[List[dict]] = None
+
+
+class BulkTasksResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkTaskResult]
+
+
+class BulkTaskSelection(BaseModel):
+    ids: Optional[List[int]] = None
+    status: Optional[TaskStatus] = None
+
+
+class BulkTaskUpdate(BulkTaskSelection):
+    set: TaskUpdate
+
+
+class BulkTaskOperationResult(BaseModel):
+    ids: List[int]
+    missing: List[int] = []
+    not_owned: List[int] = []
+    unchanged: List[int] = []
+
+
+class ImportRejection(BaseModel):
+    line: int
+    errors: List[dict]
+
+
+class TaskImportResult(BaseModel):
+    imported: int
+    rejected: int
+    rejected_lines: List[ImportRejection]
+    seconds: float
+    rows_per_second: float
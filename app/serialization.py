@@ -0,0 +1,69 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+from typing import List, Optional
+from typing_extensions import TypedDict
+from . import models, negotiation
+
+
+# Plain mirrors of schemas.Task and schemas.PaginatedTasks, in the same field
+# order. Their adapters only serialize: rows read from the database are
+# already valid, so they skip the from_attributes validation and
+# jsonable_encoder passes FastAPI would otherwise run on every item.
+class TaskRecord(TypedDict):
+    title: str
+    description: Optional[str]
+    status: models.TaskStatus
+    id: int
+    user_id: int
+
+
+class TaskPage(TypedDict):
+    items: List[TaskRecord]
+    total: Optional[int]
+    skip: int
+    limit: int
+    has_more: bool
+    next_cursor: Optional[str]
+
+
+TASK_COLUMNS = tuple(TaskRecord.__annotations__)
+
+_task_adapter = TypeAdapter(TaskRecord)
+_page_adapter = TypeAdapter(TaskPage)
+
+
+def _records(rows: list) -> List[dict]:
+    """Turns rows read with `TASK_COLUMNS` first into dicts of those columns.
+
+    Trailing columns, such as the `version` ETags are built from, are left
+    out, and the names are not looked up per row as `Row._asdict` would.
+
+    Returns:
+        list: One dict per row.
+    """
+    return [dict(zip(TASK_COLUMNS, row)) for row in rows]
+
+
+def _render(adapter: TypeAdapter, content) -> Response:
+    # the records hold only JSON types and the status enum, which
+    # negotiation.packb handles, so MessagePack needs no conversion pass
+    return negotiation.render(lambda: content, lambda: adapter.dump_json(content))
+
+
+def task_response(row) -> Response:
+    """Serializes a task row read with `TASK_COLUMNS` straight to JSON (or MessagePack).
+
+    Returns:
+        Response: The same bytes as the `schemas.Task` response model.
+    """
+    return _render(_task_adapter, _records([row])[0])
+
+
+def page_response(page: dict) -> Response:
+    """Serializes a page of task rows read with `TASK_COLUMNS` straight to JSON (or MessagePack).
+
+    Returns:
+        Response: The same bytes as the `schemas.PaginatedTasks` response model.
+    """
+    page["items"] = _records(page["items"])
+    return _render(_page_adapter, page)
@@ -0,0 +1,75 @@
+"""Measures CPU cost against bytes saved for each response encoding and level.
+
+Compresses a realistic page of tasks (100 tasks with 500-character
+descriptions, as served by GET /tasks/) and a streamed export of the same
+rows in 1000-row chunks, with the compressors used by
+`app.compression.CompressionMiddleware`.
+
+Usage:
+    python benchmarks/bench_compression.py --page-size 100 --export-rows 100000
+"""
+import argparse
+import json
+import random
+import time
+
+from app.compression import COMPRESSORS
+
+LEVELS = {"gzip": [1, 4, 6, 9], "br": [1, 4, 5, 6, 9, 11], "zstd": [1, 3, 6, 12, 19]}
+WORDS = ("buy milk call mom write report review code plan trip fix bug clean "
+         "kitchen book flight pay rent send invoice order parts update docs").split()
+
+
+def task(i: int, rng: random.Random) -> dict:
+    def text(length):
+        words = []
+        while sum(len(word) + 1 for word in words) < length:
+            words.append(rng.choice(WORDS))
+        return " ".join(words)[:length]
+
+    return {"title": text(40), "description": text(500),
+            "status": rng.choice(["NEW", "IN_PROGRESS", "COMPLETED"]), "id": i, "user_id": 1}
+
+
+def measure(encoding: str, level: int, chunks: list, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        compressor = COMPRESSORS[encoding](level)
+        started = time.perf_counter()
+        if len(chunks) == 1:
+            size = len(compressor.finish(chunks[0]))
+        else:
+            size = sum(len(compressor.compress(chunk)) for chunk in chunks)
+            size += len(compressor.finish())
+        best = min(best, time.perf_counter() - started)
+    return size, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--export-rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    items = [task(i, rng) for i in range(args.page_size)]
+    page = json.dumps({"items": items, "total": 10000, "skip": 0, "limit": args.page_size,
+                       "has_more": True, "next_cursor": "eyJpZCI6MTAwfQ"},
+                      separators=(",", ":")).encode()
+    rows = [json.dumps(task(i, rng), separators=(",", ":")) + "\n" for i in range(args.export_rows)]
+    export = ["".join(rows[i:i + 1000]).encode() for i in range(0, len(rows), 1000)]
+
+    for name, chunks, repeat in (("page", [page], args.repeat), ("export", export, 1)):
+        total = sum(len(chunk) for chunk in chunks)
+        print(f"\n{name}: {total:,} bytes in {len(chunks)} chunk(s)")
+        print(f"{'encoding':8} {'level':>5} {'bytes':>12} {'saved':>7} {'ms':>9} {'MB/s':>8}")
+        for encoding, levels in LEVELS.items():
+            for level in levels:
+                size, seconds = measure(encoding, level, chunks, repeat)
+                print(f"{encoding:8} {level:5} {size:12,} {1 - size / total:7.1%} "
+                      f"{seconds * 1000:9.2f} {total / seconds / 1e6:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Uploads a generated NDJSON or CSV file to `POST /tasks/import`.
+
+Prints the server's summary, which includes rows per second, next to the
+client-side wall time. Register the user first with `POST /users/`.
+
+Usage:
+    uvicorn app.main:app &
+    python benchmarks/bench_import.py --url http://localhost:8000 \
+        --username bench --password benchmark --rows 1000000 --format csv
+"""
+import argparse
+import json
+import time
+
+import httpx
+
+
+def generate(rows: int, fmt: str, chunk_rows: int = 10000):
+    if fmt == "csv":
+        yield b"title,description,status\n"
+    for start in range(0, rows, chunk_rows):
+        lines = []
+        for n in range(start, min(start + chunk_rows, rows)):
+            if fmt == "csv":
+                lines.append(f'Imported task {n},"Description, number {n}",NEW\n')
+            else:
+                lines.append(json.dumps({"title": f"Imported task {n}", "description": f"Description, number {n}"}) + "\n")
+        yield "".join(lines).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=args.url, timeout=None) as client:
+        token = client.post(
+            "/token", data={"username": args.username, "password": args.password}
+        ).raise_for_status().json()["access_token"]
+        content_type = "text/csv" if args.format == "csv" else "application/x-ndjson"
+        started = time.perf_counter()
+        response = client.post(
+            "/tasks/import",
+            content=generate(args.rows, args.format),
+            headers={"Authorization": f"Bearer {token}", "Content-Type": content_type},
+        ).raise_for_status()
+        elapsed = time.perf_counter() - started
+    summary = response.json()
+    summary.pop("rejected_lines")
+    print(summary)
+    print(f"client wall time {elapsed:.1f}s, {args.rows / elapsed:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compares JSON and MessagePack task payloads: size, encode and decode time.
+
+Encodes pages of tasks the way GET /tasks/ does (the prebuilt adapters in
+`app.serialization`, JSON via `dump_json`, MessagePack via
+`app.negotiation.packb`) and decodes them the way a Python client would.
+
+Usage:
+    python benchmarks/bench_msgpack.py --page-sizes 1 10 100 --repeat 2000
+"""
+import argparse
+import json
+import random
+import timeit
+
+import msgpack
+
+from app import models, negotiation, serialization
+
+
+def page(size: int, rng: random.Random) -> dict:
+    items = [{
+        "title": f"Task {i}",
+        "description": " ".join(rng.choice(["buy", "milk", "call", "report", "fix", "bug"])
+                                for _ in range(rng.randint(0, 80))) or None,
+        "status": rng.choice(list(models.TaskStatus)),
+        "id": 1000000 + i,
+        "user_id": 42,
+    } for i in range(size)]
+    return {"items": items, "total": 123456, "skip": 0, "limit": size,
+            "has_more": True, "next_cursor": "eyJpZCI6MTAwMDEwMH0"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    adapter = serialization._page_adapter
+    rng = random.Random(0)
+    print(f"{'tasks':>5} {'format':8} {'bytes':>8} {'encode us':>10} {'decode us':>10}")
+    for size in args.page_sizes:
+        content = page(size, rng)
+        formats = {
+            "json": (lambda: adapter.dump_json(content), json.loads),
+            "msgpack": (lambda: negotiation.packb(content), msgpack.unpackb),
+        }
+        decoded = {}
+        for name, (encode, decode) in formats.items():
+            body = encode()
+            decoded[name] = decode(body)
+            encode_seconds = min(timeit.repeat(encode, number=args.repeat, repeat=3))
+            decode_seconds = min(timeit.repeat(lambda: decode(body), number=args.repeat, repeat=3))
+            print(f"{size:5} {name:8} {len(body):8,} {encode_seconds / args.repeat * 1e6:10.1f} "
+                  f"{decode_seconds / args.repeat * 1e6:10.1f}")
+        assert decoded["json"] == decoded["msgpack"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Times serializing a page of tasks the default FastAPI way and the fast way.
+
+The default path validates ORM objects into `schemas.PaginatedTasks`
+(`from_attributes`), runs `jsonable_encoder` and `json.dumps`; the fast path
+dumps Core rows with the prebuilt adapters in `app.serialization`. Uses an
+in-memory SQLite database, so only serialization is measured.
+
+Usage:
+    python benchmarks/bench_serialization.py --page-size 100 --repeat 2000
+"""
+import argparse
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app import crud, models, schemas, serialization
+from app.database import Base
+from app.main import _page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(models.User).values(
+            id=1, username="bench", first_name="Bench", password="x"))
+        connection.execute(insert(models.Task), [
+            {"title": f"Task {i}", "description": "Some description " * 10,
+             "status": models.TaskStatus.NEW, "user_id": 1}
+            for i in range(args.page_size)
+        ])
+
+    with Session(engine) as db:
+        tasks, total, has_more = crud.get_user_tasks(db, 1, limit=args.page_size)
+        rows, *_ = crud.get_user_tasks(
+            db, 1, limit=args.page_size, columns=serialization.TASK_COLUMNS)
+
+        def default():
+            page = schemas.PaginatedTasks.model_validate(
+                _page(tasks, total, has_more, 0, args.page_size))
+            return JSONResponse(jsonable_encoder(page)).body
+
+        def fast():
+            return serialization.page_response(
+                _page(rows, total, has_more, 0, args.page_size)).body
+
+        assert default() == fast()
+        for name, function in (("default", default), ("fast", fast)):
+            seconds = min(timeit.repeat(function, number=args.repeat, repeat=3))
+            print(f"{name:8} {seconds / args.repeat * 1e6:8.1f} us/page "
+                  f"({args.page_size} tasks)")
+
+
+if __name__ == "__main__":
+    main()
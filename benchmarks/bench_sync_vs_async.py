@@ -0,0 +1,55 @@
+"""Compares the sync and /async endpoints of a running API under concurrency.
+
+Usage:
+    uvicorn app.main:app --workers 1 &
+    python benchmarks/bench_sync_vs_async.py --url http://localhost:8000 \
+        --requests 2000 --concurrency 64 --path /tasks/?limit=10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def run(client: httpx.AsyncClient, path: str, total: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "req/s": total / elapsed,
+        "p50 ms": statistics.median(latencies) * 1000,
+        "p99 ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/tasks/?limit=10")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        for label, path in (("sync", args.path), ("async", "/async" + args.path)):
+            await client.get(path)  # warm up pools
+            result = await run(client, path, args.requests, args.concurrency)
+            print(f"{label:>5}: " + ", ".join(f"{k}={v:.1f}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,13 +1,15 @@
 import pytest
 import pytest_asyncio
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import StaticPool, NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.main import app
-from app.deps import get_db
+from app.deps import get_db, get_async_db
 from app.database import Base
-from app import models, schemas
+from app import models, schemas, auth, crud
 from passlib.context import CryptContext
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -17,6 +19,16 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    # SQLite leaves foreign keys off by default; PostgreSQL always enforces them
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+event.listen(engine, "connect", _enable_foreign_keys)
 TestingSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine)
 
@@ -39,6 +51,41 @@ def session():
     models.Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def record_statements():
+    """Records the SQL sent to the test database within a `with` block.
+
+    Returns:
+        Callable: A context manager yielding the list of recorded statements.
+    """
+    @contextmanager
+    def record():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return record
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Clears in-process caches so state never leaks between tests."""
+    auth.user_cache.clear()
+    auth._revoked_versions.clear()
+    crud.task_cache.clear()
+    yield
+    auth.user_cache.clear()
+    auth._revoked_versions.clear()
+    crud.task_cache.clear()
+
+
 @pytest.fixture
 def client(session):
     """Creates a FastAPI test client with overridden database dependency.
@@ -57,6 +104,34 @@ def client(session):
     del app.dependency_overrides[get_db]
 
 
+@pytest.fixture
+def async_client(tmp_path):
+    """Creates a test client whose async endpoints use aiosqlite.
+
+    Yields:
+        TestClient: A FastAPI test client for the /async endpoints.
+    """
+    database_path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool
+    )
+    event.listen(async_engine.sync_engine, "connect", _enable_foreign_keys)
+    AsyncTestingSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield TestClient(app)
+    del app.dependency_overrides[get_async_db]
+
+
 @pytest_asyncio.fixture
 async def test_user(session):
     """Creates a test user in the database.
@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+from fastapi import status
+from app import crud
+from app.cache import ReadThroughCache, TTLCache
+
+
+@pytest.fixture
+def async_token(async_client):
+    """Registers a user through the async endpoints and logs them in.
+
+    Returns:
+        str: The JWT access token.
+    """
+    response = async_client.post(
+        "/async/users/",
+        json={"first_name": "Async", "username": "asyncuser", "password": "sabuhi123"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    response = async_client.post(
+        "/async/token",
+        data={"username": "asyncuser", "password": "sabuhi123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()["access_token"]
+
+
+def test_async_task_lifecycle(async_client, async_token):
+    """Tests creating, reading, updating, completing and deleting a task."""
+    headers = {"Authorization": f"Bearer {async_token}"}
+    response = async_client.post(
+        "/async/tasks/", json={"title": "Async Task"}, headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    task_id = response.json()["id"]
+
+    response = async_client.get(f"/async/tasks/{task_id}")
+    assert response.json()["title"] == "Async Task"
+
+    response = async_client.put(
+        f"/async/tasks/{task_id}", json={"status": "IN_PROGRESS"}, headers=headers
+    )
+    assert response.json()["status"] == "IN_PROGRESS"
+
+    response = async_client.patch(f"/async/tasks/{task_id}/complete", headers=headers)
+    assert response.json()["status"] == "COMPLETED"
+
+    response = async_client.get("/async/tasks/user/", headers=headers)
+    assert response.json()["total"] == 1
+
+    response = async_client.delete(f"/async/tasks/{task_id}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert async_client.get(f"/async/tasks/{task_id}").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_async_read_tasks_pagination(async_client, async_token):
+    """Tests the async task listing with a status filter and bad limits."""
+    headers = {"Authorization": f"Bearer {async_token}"}
+    for i in range(3):
+        async_client.post("/async/tasks/", json={"title": f"Task {i}"}, headers=headers)
+    response = async_client.get("/async/tasks/?limit=2&status=NEW")
+    data = response.json()
+    assert len(data["items"]) == 2
+    assert data["total"] == 3
+    response = async_client.get("/async/tasks/?limit=0")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_async_delete_user(async_client, async_token):
+    """Tests deleting the authenticated user through the async endpoint."""
+    headers = {"Authorization": f"Bearer {async_token}"}
+    response = async_client.delete("/async/users/me", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    response = async_client.get("/async/tasks/user/", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_async_delete_large_user_purges_in_background(async_client, async_token, monkeypatch):
+    """Tests that the async endpoint also purges large accounts in batches."""
+    monkeypatch.setattr(crud, "USER_PURGE_THRESHOLD", 2)
+    monkeypatch.setattr(crud, "USER_PURGE_BATCH_SIZE", 2)
+    headers = {"Authorization": f"Bearer {async_token}"}
+    task_ids = [
+        async_client.post("/async/tasks/", json={"title": f"Task {i}"}, headers=headers).json()["id"]
+        for i in range(5)
+    ]
+    response = async_client.delete("/async/users/me", headers=headers)
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    for task_id in task_ids:
+        assert async_client.get(f"/async/tasks/{task_id}").status_code == status.HTTP_404_NOT_FOUND
+    response = async_client.post("/async/token", data={"username": "asyncuser", "password": "sabuhi123"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_async_writes_invalidate_cache_off_the_event_loop(async_client, async_token, monkeypatch):
+    """Tests that async task writes invalidate the task cache from the threadpool."""
+    on_loop = []
+
+    class LoopCheckingCache(TTLCache):
+        def delete_many(self, keys):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(keys)
+            except RuntimeError:
+                pass
+            super().delete_many(keys)
+
+    backend = LoopCheckingCache(maxsize=10, ttl=60)
+    monkeypatch.setattr(crud, "task_cache", ReadThroughCache(backend))
+    headers = {"Authorization": f"Bearer {async_token}"}
+    ids = [
+        async_client.post("/async/tasks/", json={"title": f"Task {i}"}, headers=headers).json()["id"]
+        for i in range(3)
+    ]
+    for task_id in ids:
+        backend.set(task_id, "cached")
+
+    async_client.put(f"/async/tasks/{ids[0]}", json={"title": "Renamed"}, headers=headers)
+    async_client.patch(f"/async/tasks/{ids[1]}/complete", headers=headers)
+    async_client.delete(f"/async/tasks/{ids[2]}", headers=headers)
+    assert [backend.get(task_id) for task_id in ids] == [None] * 3
+    assert on_loop == []
@@ -0,0 +1,232 @@
+import threading
+import time
+import fakeredis
+import pytest
+from fastapi import status
+from app import crud
+from app.cache import ReadThroughCache, RedisCache, TTLCache
+
+
+@pytest.fixture(params=["memory", "redis"])
+def task_cache(request, monkeypatch):
+    """Swaps the task cache for a fresh one on each backend.
+
+    Returns:
+        ReadThroughCache: The cache the task endpoints now use.
+    """
+    if request.param == "memory":
+        backend = TTLCache(maxsize=100, ttl=60)
+    else:
+        backend = RedisCache(fakeredis.FakeRedis(), ttl=60, prefix="task:")
+    cache = ReadThroughCache(backend)
+    monkeypatch.setattr(crud, "task_cache", cache)
+    return cache
+
+
+def test_task_read_served_from_cache(client, token, task_cache, record_statements):
+    """Tests that a repeated task read does not query the database."""
+    headers = {"Authorization": f"Bearer {token}"}
+    task = client.post("/tasks/", json={"title": "Cached"}, headers=headers).json()
+
+    first = client.get(f"/tasks/{task['id']}")
+    with record_statements() as statements:
+        second = client.get(f"/tasks/{task['id']}")
+    assert not any("FROM tasks" in s for s in statements)
+    assert second.json() == first.json() == task
+    assert second.headers["etag"] == first.headers["etag"]
+    assert client.get(f"/tasks/{task['id']}?fields=title").json() == {"id": task["id"], "title": "Cached"}
+
+    stats = client.get("/metrics").json()["task_cache"]
+    assert stats["backend"] == type(task_cache.backend).__name__
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == pytest.approx(2 / 3)
+    assert stats["loads"] == 1
+
+
+def test_task_writes_invalidate_cache(client, token, task_cache):
+    """Tests that every kind of task write is visible to the next read."""
+    headers = {"Authorization": f"Bearer {token}"}
+    ids = [
+        client.post("/tasks/", json={"title": f"Task {i}"}, headers=headers).json()["id"]
+        for i in range(4)
+    ]
+    for task_id in ids:
+        assert client.get(f"/tasks/{task_id}").status_code == status.HTTP_200_OK
+
+    etag = client.get(f"/tasks/{ids[0]}").headers["etag"]
+    client.put(f"/tasks/{ids[0]}", json={"title": "Renamed"}, headers=headers)
+    response = client.get(f"/tasks/{ids[0]}")
+    assert response.json()["title"] == "Renamed"
+    assert response.headers["etag"] != etag
+
+    client.patch(f"/tasks/{ids[1]}/complete", headers=headers)
+    assert client.get(f"/tasks/{ids[1]}").json()["status"] == "COMPLETED"
+
+    client.post("/tasks/bulk/update", json={"ids": ids[2:], "set": {"description": "moved"}}, headers=headers)
+    assert [client.get(f"/tasks/{task_id}").json()["description"] for task_id in ids[2:]] == ["moved"] * 2
+
+    client.delete(f"/tasks/{ids[0]}", headers=headers)
+    assert client.get(f"/tasks/{ids[0]}").status_code == status.HTTP_404_NOT_FOUND
+    client.post("/tasks/bulk/delete", json={"ids": ids[1:3]}, headers=headers)
+    assert client.get(f"/tasks/{ids[1]}").status_code == status.HTTP_404_NOT_FOUND
+
+    client.delete("/users/me", headers=headers)
+    assert client.get(f"/tasks/{ids[3]}").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_purged_user_tasks_invalidated(client, token, session, test_user, task_cache, monkeypatch):
+    """Tests that the batched purge of a large account invalidates its tasks."""
+    monkeypatch.setattr(crud, "USER_PURGE_THRESHOLD", 1)
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/tasks/bulk", json=[{"title": f"Task {i}"} for i in range(3)], headers=headers)
+    ids = [client.get(f"/tasks/{task_id}").json()["id"] for task_id in (1, 2, 3)]
+
+    assert client.delete("/users/me", headers=headers).status_code == status.HTTP_202_ACCEPTED
+    for task_id in ids:
+        assert client.get(f"/tasks/{task_id}").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_cache_entries_expire():
+    """Tests that entries are reloaded once their TTL has passed."""
+    cache = ReadThroughCache(TTLCache(maxsize=10, ttl=0.05))
+    values = iter(["old", "new"])
+    assert cache.get(1, lambda: next(values)) == "old"
+    assert cache.get(1, lambda: next(values)) == "old"
+    time.sleep(0.06)
+    assert cache.get(1, lambda: next(values)) == "new"
+    assert cache.stats()["loads"] == 2
+
+
+def test_missing_tasks_are_not_cached():
+    """Tests that a None result is returned but loaded again next time."""
+    cache = ReadThroughCache(TTLCache(maxsize=10, ttl=60))
+    calls = []
+    assert cache.get(1, lambda: calls.append(1)) is None
+    assert cache.get(1, lambda: calls.append(1)) is None
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("backend", [
+    lambda: TTLCache(maxsize=10, ttl=60),
+    lambda: RedisCache(fakeredis.FakeRedis(), ttl=60),
+])
+def test_concurrent_misses_share_one_load(backend):
+    """Tests stampede protection: simultaneous misses on a key load it once."""
+    cache = ReadThroughCache(backend())
+    release = threading.Event()
+    loads = []
+
+    def load():
+        loads.append(1)
+        release.wait(5)
+        return ["value"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(1, load))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while len(cache._loading) == 0:
+        time.sleep(0.001)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert results == [["value"]] * 8
+    stats = cache.stats()
+    assert stats["loads"] == 1
+    assert stats["coalesced"] == 7
+
+
+def test_invalidation_during_load_is_not_cached():
+    """Tests that a value loaded before an invalidation never reaches the cache."""
+    cache = ReadThroughCache(TTLCache(maxsize=10, ttl=60))
+    loading, release = threading.Event(), threading.Event()
+
+    def slow_load():
+        loading.set()
+        release.wait(5)
+        return "outdated"
+
+    thread = threading.Thread(target=cache.get, args=(1, slow_load))
+    thread.start()
+    loading.wait(5)
+    cache.delete(1)
+    release.set()
+    thread.join()
+
+    assert cache.get(1, lambda: "current") == "current"
+
+
+def test_invalidation_during_store_is_not_cached():
+    """Tests that a slow store does not block invalidations, which still win."""
+    storing, release = threading.Event(), threading.Event()
+
+    class SlowBackend(TTLCache):
+        def set(self, key, value, ttl=None):
+            storing.set()
+            release.wait(5)
+            super().set(key, value, ttl)
+
+    cache = ReadThroughCache(SlowBackend(maxsize=10, ttl=60))
+    thread = threading.Thread(target=cache.get, args=(1, lambda: "outdated"))
+    thread.start()
+    storing.wait(5)
+    invalidation = threading.Thread(target=cache.delete, args=(1,))
+    invalidation.start()
+    invalidation.join(1)
+    assert not invalidation.is_alive()
+    release.set()
+    thread.join()
+
+    assert cache.get(1, lambda: "current") == "current"
+
+
+def test_invalidation_in_another_worker_is_not_overwritten():
+    """Tests that a Redis load started before another worker's invalidation is not stored."""
+    server = fakeredis.FakeServer()
+    worker, other = (
+        ReadThroughCache(RedisCache(fakeredis.FakeRedis(server=server), ttl=60, tombstone_ttl=0.1))
+        for _ in range(2)
+    )
+    loading, release = threading.Event(), threading.Event()
+
+    def slow_load():
+        loading.set()
+        release.wait(5)
+        return "outdated"
+
+    thread = threading.Thread(target=worker.get, args=(1, slow_load))
+    thread.start()
+    loading.wait(5)
+    other.delete(1)
+    release.set()
+    thread.join()
+
+    assert worker.get(1, lambda: "current") == "current"
+    time.sleep(0.11)
+    assert other.get(1, lambda: "current") == "current"
+    assert worker.get(1, lambda: "reloaded") == "current"
+
+
+def test_redis_errors_fail_open():
+    """Tests that an unreachable Redis server falls back to the loader."""
+    server = fakeredis.FakeServer()
+    server.connected = False
+    backend = RedisCache(fakeredis.FakeRedis(server=server), ttl=60)
+    cache = ReadThroughCache(backend)
+
+    assert cache.get(1, lambda: "loaded") == "loaded"
+    cache.delete(1)
+    assert backend.stats()["errors"] == 3
+
+
+def test_disabled_cache_always_loads(client, token, monkeypatch):
+    """Tests that TASK_CACHE_BACKEND=none reads every task from the database."""
+    monkeypatch.setattr(crud, "task_cache", ReadThroughCache(None))
+    headers = {"Authorization": f"Bearer {token}"}
+    task = client.post("/tasks/", json={"title": "Uncached"}, headers=headers).json()
+    assert client.get(f"/tasks/{task['id']}").json() == task
+    assert client.get("/metrics").json()["task_cache"] == {"backend": None}
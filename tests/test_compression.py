@@ -0,0 +1,124 @@
+import asyncio
+import gzip
+import brotli
+import pytest
+import zlib
+import zstandard
+from app import compression
+
+DECOMPRESS = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+
+def _raw_get(client, url, accept_encoding, headers=None):
+    """Fetches a response without letting the client decode its body."""
+    with client.stream("GET", url, headers={**(headers or {}), "Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def _seed(client, token, count=100):
+    tasks = [{"title": f"Task {i}", "description": "lorem ipsum dolor " * 25} for i in range(count)]
+    response = client.post("/tasks/bulk", json=tasks, headers={"Authorization": f"Bearer {token}"})
+    assert response.json()["created"] == count
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br, zstd", "zstd"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("br, gzip;q=0.9", "br"),
+    ("*", "zstd"),
+    ("*;q=0.1, zstd;q=0", "br"),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("", None),
+])
+def test_negotiate(header, expected):
+    """Tests picking an encoding by q-value, then by server preference."""
+    assert compression.negotiate(header, ["zstd", "br", "gzip"]) == expected
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_large_pages_are_compressed(client, token, encoding):
+    """Tests that a page above the threshold is compressed with the negotiated encoding."""
+    _seed(client, token)
+    plain, plain_body = _raw_get(client, "/tasks/?limit=100", "identity")
+    assert "content-encoding" not in plain.headers
+    assert len(plain_body) > 40000
+    before = compression.stats()[encoding]
+
+    response, body = _raw_get(client, "/tasks/?limit=100", encoding)
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept, Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(body) < len(plain_body) / 5
+    # compressed bytes differ from the identity ones, so the ETag turns weak
+    assert response.headers["etag"] == f"W/{plain.headers['etag']}"
+    response, _ = _raw_get(client, "/tasks/?limit=100", encoding, headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+    assert DECOMPRESS[encoding](body) == plain_body
+
+    after = compression.stats()[encoding]
+    assert after["responses"] == before["responses"] + 1
+    assert after["bytes_in"] - before["bytes_in"] == len(plain_body)
+    assert after["bytes_out"] - before["bytes_out"] == len(body)
+
+
+def test_small_and_empty_responses_are_not_compressed(client, token):
+    """Tests that bodies below the threshold and 304s are sent as they are."""
+    response, body = _raw_get(client, "/", "gzip, br, zstd")
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept, Accept-Encoding"
+    assert body == b'{"message":"Welcome to ToDo API"}'
+
+    _seed(client, token, count=1)
+    etag = client.get("/tasks/").headers["etag"]
+    response, body = _raw_get(client, "/tasks/", "gzip", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert "content-encoding" not in response.headers and body == b""
+
+
+def test_streamed_export_is_compressed(client, token, monkeypatch):
+    """Tests that the export stream is compressed and decodes to the plain export."""
+    monkeypatch.setattr("app.bulk.TASK_EXPORT_BATCH_SIZE", 10)
+    _seed(client, token, count=50)
+    headers = {"Authorization": f"Bearer {token}"}
+    plain, plain_body = _raw_get(client, "/tasks/user/export", "identity", headers)
+    response, body = _raw_get(client, "/tasks/user/export", "zstd", headers)
+    assert response.headers["content-encoding"] == "zstd"
+    assert "content-length" not in response.headers
+    assert DECOMPRESS["zstd"](body) == plain_body
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_streamed_chunks_are_flushed(encoding):
+    """Tests that every streamed chunk decodes on arrival, without the next one."""
+    chunks = [b'{"title":"Task %d"}\n' % i * 20 for i in range(3)]
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"application/x-ndjson"), (b"content-length", b"999")]})
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", encoding.encode())]}
+    asyncio.run(compression.CompressionMiddleware(app, minimum_size=10**6)(scope, None, send))
+    headers = dict(messages[0]["headers"])
+    assert headers[b"content-encoding"] == encoding.encode()
+    assert b"content-length" not in headers
+    decompressor = {
+        "gzip": lambda: zlib.decompressobj(16 + zlib.MAX_WBITS),
+        "br": brotli.Decompressor,
+        "zstd": lambda: zstandard.ZstdDecompressor().decompressobj(),
+    }[encoding]()
+    decode = decompressor.process if encoding == "br" else decompressor.decompress
+    bodies = [message["body"] for message in messages[1:]]
+    assert [decode(body) for body in bodies[:-1]] == chunks
+    assert messages[-1].get("more_body", False) is False
@@ -0,0 +1,116 @@
+import pytest
+import sqlite3
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import sessionmaker
+from app import database, deps, manage, models
+from app.database import Base, InstrumentedQueuePool
+from app.main import app
+
+
+def test_pool_reports_in_use_and_wait():
+    """Tests that the pool gauges track checked-out connections."""
+    pool = InstrumentedQueuePool(
+        lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.05
+    )
+    connection = pool.connect()
+    stats = pool.stats()
+    assert stats["in_use"] == 1
+    assert stats["checkouts"] == 1
+    with pytest.raises(exc.TimeoutError):
+        pool.connect()
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["wait_max"] >= 0.05
+    connection.close()
+    assert pool.stats()["in_use"] == 0
+
+
+def test_metrics_include_db_pool(client):
+    """Tests that the metrics endpoint exposes the pool gauges."""
+    metrics = client.get("/metrics").json()
+    for stats in (metrics["db_pool"], metrics["db_async_pool"]):
+        assert {"size", "in_use", "idle", "overflow", "wait_avg", "wait_max"} <= stats.keys()
+
+
+@pytest.fixture
+def replica_client(tmp_path, monkeypatch):
+    """Creates a test client with a primary and one replica SQLite file.
+
+    Yields:
+        tuple: The test client and session factories for primary and replica.
+    """
+    factories = []
+    for name in ("primary.db", "replica.db"):
+        file_engine = create_engine(f"sqlite:///{tmp_path / name}")
+        Base.metadata.create_all(bind=file_engine)
+        factories.append(sessionmaker(autocommit=False, autoflush=False, bind=file_engine))
+    primary, replica = factories
+    monkeypatch.setattr(deps, "SessionLocal", primary)
+    monkeypatch.setattr(
+        database,
+        "replica_router",
+        database.ReplicaRouter([replica], sticky_seconds=60, max_clients=100),
+    )
+    yield TestClient(app), primary, replica
+
+
+def test_reads_go_to_replica_and_writes_stick_to_primary(replica_client):
+    """Tests round-robin replica reads and read-your-writes stickiness."""
+    client, primary, replica = replica_client
+    with replica() as db:
+        db.add(models.User(id=1, first_name="R", username="r", password="x"))
+        db.add(models.Task(title="On replica", user_id=1))
+        db.commit()
+    response = client.get("/tasks/")
+    assert [task["title"] for task in response.json()["items"]] == ["On replica"]
+
+    client.post("/users/", json={"first_name": "P", "username": "p", "password": "sabuhi123"})
+    token = client.post(
+        "/token",
+        data={"username": "p", "password": "sabuhi123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/tasks/", json={"title": "On primary"}, headers=headers)
+
+    response = client.get("/tasks/", headers=headers)
+    assert [task["title"] for task in response.json()["items"]] == ["On primary"]
+    response = client.get("/tasks/")
+    assert [task["title"] for task in response.json()["items"]] == ["On replica"]
+
+
+def test_create_missing_indexes(tmp_path):
+    """Tests that create-indexes builds only the indexes an existing database lacks."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'indexes.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_tasks_user_id_status_id")
+
+    assert manage.create_missing_indexes(engine) == ["ix_tasks_user_id_status_id"]
+    assert manage.create_missing_indexes(engine) == []
+    engine.dispose()
+
+
+def test_drop_global_task_counters(tmp_path):
+    """Tests that migrating removes the all-users counter rows and their triggers."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'counters.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TRIGGER task_counters_insert")
+        connection.exec_driver_sql(
+            "CREATE TRIGGER task_counters_insert AFTER INSERT ON tasks BEGIN "
+            "INSERT INTO task_counters (user_id, status, task_count) "
+            "VALUES (NEW.user_id, NEW.status, 1), (0, NEW.status, 1) "
+            "ON CONFLICT (user_id, status) DO UPDATE SET task_count = task_count + 1; END"
+        )
+        connection.exec_driver_sql("INSERT INTO users (username, first_name, password) VALUES ('a', 'A', 'x')")
+        connection.exec_driver_sql("INSERT INTO tasks (title, status, user_id) VALUES ('Task', 'NEW', 1)")
+
+    assert manage.drop_global_task_counters(engine) is True
+    assert manage.drop_global_task_counters(engine) is False
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO tasks (title, status, user_id) VALUES ('Task', 'NEW', 1)")
+        counters = connection.exec_driver_sql("SELECT user_id, task_count FROM task_counters").all()
+    assert counters == [(1, 2)]
+    engine.dispose()
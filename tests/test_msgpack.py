@@ -0,0 +1,114 @@
+import msgpack
+import pytest
+from fastapi import status
+from app import negotiation
+
+MSGPACK = "application/msgpack"
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("application/msgpack", True),
+    ("application/x-msgpack", True),
+    ("application/msgpack, */*", True),
+    ("application/json;q=0.5, application/msgpack", True),
+    ("application/json, application/msgpack", False),
+    ("application/msgpack;q=0.5, */*", False),
+    ("*/*", False),
+    ("application/json", False),
+    ("", False),
+])
+def test_prefers_msgpack(accept, expected):
+    """Tests that MessagePack is only chosen when the client prefers it over JSON."""
+    assert negotiation.prefers_msgpack(accept) is expected
+
+
+def _msgpack(response):
+    assert response.headers["content-type"] == MSGPACK
+    assert "Accept" in response.headers["vary"]
+    return msgpack.unpackb(response.content)
+
+
+def test_task_endpoints_answer_in_msgpack(client, token):
+    """Tests MessagePack request and response bodies across the task endpoints."""
+    headers = {"Authorization": f"Bearer {token}", "Accept": MSGPACK}
+    response = client.post(
+        "/tasks/",
+        content=msgpack.packb({"title": "Packed ✓", "description": "Binary"}),
+        headers={**headers, "Content-Type": MSGPACK},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    task = _msgpack(response)
+    assert task["title"] == "Packed ✓" and task["status"] == "NEW"
+    task_id = task["id"]
+
+    response = client.put(
+        f"/tasks/{task_id}",
+        content=msgpack.packb({"status": "IN_PROGRESS"}),
+        headers={**headers, "Content-Type": MSGPACK},
+    )
+    assert _msgpack(response)["status"] == "IN_PROGRESS"
+
+    for url in (f"/tasks/{task_id}", f"/tasks/{task_id}?fields=title", "/tasks/",
+                "/tasks/user/?fields=status", "/tasks/user/search?q=binary"):
+        json_body = client.get(url, headers={"Authorization": headers["Authorization"]}).json()
+        assert _msgpack(client.get(url, headers=headers)) == json_body
+
+    response = client.get(f"/tasks/{task_id}", headers={"Accept": "*/*"})
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_etags_differ_per_format(client, token):
+    """Tests that JSON and MessagePack bodies of one URL never share an ETag."""
+    auth = {"Authorization": f"Bearer {token}"}
+    task_id = client.post("/tasks/", json={"title": "Tagged"}, headers=auth).json()["id"]
+    for url in (f"/tasks/{task_id}", "/tasks/user/"):
+        json_etag = client.get(url, headers=auth).headers["etag"]
+        response = client.get(url, headers={**auth, "Accept": MSGPACK, "If-None-Match": json_etag})
+        assert response.status_code == status.HTTP_200_OK
+        msgpack_etag = response.headers["etag"]
+        assert msgpack_etag != json_etag
+        response = client.get(url, headers={**auth, "Accept": MSGPACK, "If-None-Match": msgpack_etag})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert client.get(url, headers={**auth, "If-None-Match": msgpack_etag}).status_code == status.HTTP_200_OK
+
+    # a MessagePack ETag names the same version for If-Match
+    etag = client.get(f"/tasks/{task_id}", headers={"Accept": MSGPACK}).headers["etag"]
+    response = client.put(f"/tasks/{task_id}", json={"title": "Retagged"}, headers={**auth, "If-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    response = client.put(f"/tasks/{task_id}", json={"title": "Stale"}, headers={**auth, "If-Match": etag})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    # and so does the weak form compressed responses carry
+    etag = client.get(f"/tasks/{task_id}").headers["etag"]
+    response = client.put(f"/tasks/{task_id}", json={"title": "Weak"}, headers={**auth, "If-Match": f"W/{etag}"})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_msgpack_body_errors(client, token):
+    """Tests that malformed and invalid MessagePack bodies are rejected."""
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": MSGPACK}
+    response = client.post("/tasks/", content=b"\xc1\x00", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid MessagePack body!"
+    response = client.post("/tasks/", content=msgpack.packb({"title": ""}), headers=headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert "title" in response.json()["detail"][0]["loc"]
+
+
+def test_async_endpoints_answer_in_msgpack(async_client):
+    """Tests that the /async mirror negotiates MessagePack too."""
+    async_client.post(
+        "/async/users/",
+        content=msgpack.packb({"first_name": "Packed", "username": "packed", "password": "sabuhi123"}),
+        headers={"Content-Type": MSGPACK},
+    )
+    token = async_client.post(
+        "/async/token", data={"username": "packed", "password": "sabuhi123"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}", "Accept": MSGPACK}
+    response = async_client.post(
+        "/async/tasks/", content=msgpack.packb({"title": "Async packed"}),
+        headers={**headers, "Content-Type": MSGPACK},
+    )
+    task = _msgpack(response)
+    page = _msgpack(async_client.get("/async/tasks/user/", headers=headers))
+    assert page["items"] == [task]
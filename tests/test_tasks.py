@@ -1,5 +1,13 @@
+import csv
+import io
+import json
 import pytest
-from app import models, schemas
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from app import bulk, crud, models, schemas, serialization
+from app.main import _page
 from fastapi import status
 
 
@@ -407,4 +415,616 @@ def test_delete_task_unauthorized(client, token, session):
     )
     
     assert response.status_code == status.HTTP_403_FORBIDDEN
-    assert response.json()["detail"] == "Not authorized to delete this task!"
\ No newline at end of file
+    assert response.json()["detail"] == "Not authorized to delete this task!"
+
+def test_read_tasks_with_cursor(client, token):
+    """Tests walking every task page by page with keyset cursors."""
+    headers = {"Authorization": f"Bearer {token}"}
+    created = [
+        client.post("/tasks/", json={"title": f"Cursor {i}"}, headers=headers).json()["id"]
+        for i in range(5)
+    ]
+    seen = []
+    response = client.get("/tasks/user/?limit=2", headers=headers)
+    while True:
+        data = response.json()
+        seen += [task["id"] for task in data["items"]]
+        if data["next_cursor"] is None:
+            break
+        response = client.get(
+            f"/tasks/user/?limit=2&cursor={data['next_cursor']}", headers=headers
+        )
+    assert seen == created
+    response = client.get("/tasks/?limit=2&status=NEW")
+    cursor = response.json()["next_cursor"]
+    response = client.get(f"/tasks/?limit=2&status=NEW&cursor={cursor}")
+    assert [task["id"] for task in response.json()["items"]] == created[2:4]
+
+
+def test_read_tasks_invalid_cursor(client):
+    """Tests that malformed cursors and skip+cursor are rejected."""
+    response = client.get("/tasks/?cursor=not-a-cursor")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Invalid cursor!"
+    response = client.get("/tasks/?cursor=eyJpZCI6MX0&skip=1")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Skip cannot be combined with cursor!"
+
+
+def test_read_tasks_total_modes(client, token):
+    """Tests exact, approximate and omitted totals on the list endpoints."""
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(3):
+        client.post("/tasks/", json={"title": f"Count {i}"}, headers=headers)
+    task_id = client.post("/tasks/", json={"title": "Done"}, headers=headers).json()["id"]
+    client.patch(f"/tasks/{task_id}/complete", headers=headers)
+
+    assert client.get("/tasks/?status=NEW").json()["total"] == 3
+    assert client.get("/tasks/?status=COMPLETED&total=approximate").json()["total"] == 1
+    assert client.get("/tasks/user/", headers=headers).json()["total"] == 4
+    response = client.get("/tasks/?skip=50")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Skip value 50 exceeds total tasks 4"
+
+    data = client.get("/tasks/user/?limit=3&total=none", headers=headers).json()
+    assert data["total"] is None
+    assert data["has_more"] is True
+    data = client.get("/tasks/user/?limit=4&total=none", headers=headers).json()
+    assert data["has_more"] is False
+    assert data["next_cursor"] is None
+
+    client.delete(f"/tasks/{task_id}", headers=headers)
+    assert client.get("/tasks/?status=COMPLETED").json()["total"] == 0
+
+
+def test_task_counters_match_tasks(client, token, session):
+    """Tests that the counter rows track creates, updates and deletes."""
+    headers = {"Authorization": f"Bearer {token}"}
+    ids = [
+        client.post("/tasks/", json={"title": f"Task {i}"}, headers=headers).json()["id"]
+        for i in range(3)
+    ]
+    client.put(f"/tasks/{ids[0]}", json={"status": "IN_PROGRESS"}, headers=headers)
+    client.delete(f"/tasks/{ids[1]}", headers=headers)
+    counters = {
+        (counter.user_id, counter.status.value): counter.task_count
+        for counter in session.query(models.TaskCounter).all()
+    }
+    user_id = client.get(f"/tasks/{ids[2]}").json()["user_id"]
+    assert counters == {(user_id, "NEW"): 1, (user_id, "IN_PROGRESS"): 1}
+    assert crud.count_tasks(session) == 2
+    assert crud.count_tasks(session, status=schemas.TaskStatus.IN_PROGRESS) == 1
+
+
+def test_task_mutations_report_missing_and_completed(client, token):
+    """Tests the errors of the single-statement update and complete paths."""
+    headers = {"Authorization": f"Bearer {token}"}
+    task_id = client.post("/tasks/", json={"title": "Task"}, headers=headers).json()["id"]
+
+    assert client.patch(f"/tasks/{task_id}/complete", headers=headers).status_code == status.HTTP_200_OK
+    response = client.patch(f"/tasks/{task_id}/complete", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Task is already completed!"
+
+    for response in (
+        client.patch("/tasks/9999/complete", headers=headers),
+        client.put("/tasks/9999", json={"title": "Missing"}, headers=headers),
+        client.put("/tasks/9999", json={}, headers=headers),
+    ):
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["detail"] == "Task not found!"
+
+
+def test_task_mutations_use_one_statement(client, token, record_statements):
+    """Tests that update and complete run a single UPDATE ... RETURNING."""
+    headers = {"Authorization": f"Bearer {token}"}
+    task_id = client.post("/tasks/", json={"title": "Task"}, headers=headers).json()["id"]
+    with record_statements() as statements:
+        response = client.put(f"/tasks/{task_id}", json={"title": "Renamed"}, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["title"] == "Renamed"
+        response = client.patch(f"/tasks/{task_id}/complete", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "COMPLETED"
+
+    assert len(statements) == 2
+    assert all(s.startswith("UPDATE tasks") and "RETURNING" in s for s in statements)
+
+
+def test_delete_task_uses_one_statement(client, token, record_statements):
+    """Tests that deleting runs a single DELETE ... RETURNING and reports missing tasks."""
+    headers = {"Authorization": f"Bearer {token}"}
+    task_id = client.post("/tasks/", json={"title": "Task"}, headers=headers).json()["id"]
+    with record_statements() as statements:
+        assert client.delete(f"/tasks/{task_id}", headers=headers).status_code == status.HTTP_200_OK
+    assert len(statements) == 1
+    assert statements[0].startswith("DELETE FROM tasks") and "RETURNING" in statements[0]
+
+    response = client.delete(f"/tasks/{task_id}", headers=headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Task not found!"
+
+
+def test_create_task_for_missing_user(session):
+    """Tests that the foreign key turns a task for an unknown user into a 404."""
+    with pytest.raises(HTTPException) as error:
+        crud.create_task(session, schemas.TaskCreate(title="Orphan"), user_id=9999)
+    assert error.value.status_code == status.HTTP_404_NOT_FOUND
+    assert error.value.detail == "User with id 9999 not found"
+    assert session.query(models.Task).count() == 0
+
+
+def test_create_tasks_bulk(client, token):
+    """Tests bulk creation from a JSON array with an invalid item."""
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post(
+        "/tasks/bulk",
+        json=[{"title": "First"}, {"title": ""}, {"title": "Third", "status": "COMPLETED"}],
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    assert [result["index"] for result in data["results"]] == [0, 1, 2]
+    assert data["results"][1]["errors"][0]["loc"] == ["title"]
+    assert data["results"][0]["id"] < data["results"][2]["id"]
+
+    tasks = client.get("/tasks/user/", headers=headers).json()
+    assert tasks["total"] == 2
+    assert [task["title"] for task in tasks["items"]] == ["First", "Third"]
+
+
+def test_create_tasks_bulk_ndjson(client, token):
+    """Tests bulk creation from NDJSON, including a malformed line."""
+    body = b'{"title": "One"}\n\nnot json\n{"title": "Two", "description": "tab\\there"}'
+    response = client.post(
+        "/tasks/bulk",
+        content=body,
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 1)
+    assert data["results"][1]["errors"][0]["type"] == "json_invalid"
+    assert client.get(
+        f"/tasks/{data['results'][2]['id']}"
+    ).json()["description"] == "tab\there"
+
+
+def test_create_tasks_bulk_limits(client, token, monkeypatch):
+    """Tests the bulk batch size limit and malformed bodies."""
+    monkeypatch.setattr(bulk, "TASK_BULK_MAX_ITEMS", 2)
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post("/tasks/bulk", json=[{"title": "t"}] * 3, headers=headers)
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert response.json()["detail"] == "Batch exceeds the maximum of 2 tasks!"
+    response = client.post(
+        "/tasks/bulk",
+        content=b'{"title": "t"}\n' * 3,
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert client.post("/tasks/bulk", json={"title": "t"}, headers=headers).status_code == 422
+    assert client.post("/tasks/bulk", content=b"[", headers=headers).status_code == 400
+
+    monkeypatch.setattr(bulk, "TASK_BULK_MAX_BYTES", 64)
+    response = client.post("/tasks/bulk", json=[{"title": "x" * 40}] * 2, headers=headers)
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert response.json()["detail"] == "Request body exceeds the maximum of 64 bytes!"
+    # without a Content-Length, reading stops at the limit
+    body = iter([b'[{"title": "', b"x" * 80, b'"}]'])
+    response = client.post("/tasks/bulk", content=body, headers={**headers, "Content-Type": "application/json"})
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert client.get("/tasks/").json()["total"] == 0
+
+
+def _other_user_token(client):
+    client.post("/users/", json={"username": "bulkother", "password": "sabuhi123", "first_name": "Other"})
+    return client.post(
+        "/token", data={"username": "bulkother", "password": "sabuhi123"}
+    ).json()["access_token"]
+
+
+def test_bulk_complete_and_delete_by_ids(client, token):
+    """Tests bulk complete and delete by ids with partial-failure reporting."""
+    headers = {"Authorization": f"Bearer {token}"}
+    other_headers = {"Authorization": f"Bearer {_other_user_token(client)}"}
+    mine = [r["id"] for r in client.post("/tasks/bulk", json=[{"title": "a"}, {"title": "b"}, {"title": "c"}], headers=headers).json()["results"]]
+    theirs = client.post("/tasks/", json={"title": "theirs"}, headers=other_headers).json()["id"]
+
+    response = client.post("/tasks/bulk/complete", json={"ids": mine[:2] + [theirs, 9999]}, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"ids": mine[:2], "missing": [9999], "not_owned": [theirs], "unchanged": []}
+
+    response = client.post("/tasks/bulk/complete", json={"ids": mine}, headers=headers)
+    assert response.json() == {"ids": [mine[2]], "missing": [], "not_owned": [], "unchanged": mine[:2]}
+
+    response = client.post("/tasks/bulk/delete", json={"ids": [mine[0], theirs, 9999]}, headers=headers)
+    assert response.json() == {"ids": [mine[0]], "missing": [9999], "not_owned": [theirs], "unchanged": []}
+    assert client.get(f"/tasks/{theirs}").status_code == status.HTTP_200_OK
+    assert client.get("/tasks/user/", headers=headers).json()["total"] == 2
+
+
+def test_bulk_update_and_delete_by_status(client, token):
+    """Tests bulk update and delete selected by a status filter."""
+    headers = {"Authorization": f"Bearer {token}"}
+    other_headers = {"Authorization": f"Bearer {_other_user_token(client)}"}
+    client.post("/tasks/bulk", json=[{"title": "a"}, {"title": "b"}, {"title": "c", "status": "IN_PROGRESS"}], headers=headers)
+    theirs = client.post("/tasks/", json={"title": "theirs"}, headers=other_headers).json()["id"]
+
+    response = client.post(
+        "/tasks/bulk/update",
+        json={"status": "NEW", "set": {"status": "IN_PROGRESS", "description": "moved"}},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["ids"]) == 2
+    items = client.get("/tasks/user/", headers=headers).json()["items"]
+    assert {task["status"] for task in items} == {"IN_PROGRESS"}
+
+    response = client.post("/tasks/bulk/delete", json={"status": "IN_PROGRESS"}, headers=headers)
+    assert len(response.json()["ids"]) == 3
+    assert client.get("/tasks/user/", headers=headers).json()["total"] == 0
+    assert client.get(f"/tasks/{theirs}").json()["status"] == "NEW"
+
+
+def test_bulk_operation_validation(client, token, monkeypatch):
+    """Tests the selection, update and batch size checks of bulk operations."""
+    headers = {"Authorization": f"Bearer {token}"}
+    for body in ({}, {"ids": [1], "status": "NEW"}):
+        response = client.post("/tasks/bulk/delete", json=body, headers=headers)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"] == "Select tasks by either ids or status!"
+    response = client.post("/tasks/bulk/update", json={"ids": [1], "set": {}}, headers=headers)
+    assert response.json()["detail"] == "No fields to update!"
+    for field in ("title", "status"):
+        response = client.post("/tasks/bulk/update", json={"ids": [1], "set": {field: None}}, headers=headers)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"] == f"{field.capitalize()} cannot be null!"
+    for title in ("", "   ", "x" * 101):
+        response = client.post("/tasks/bulk/update", json={"ids": [1], "set": {"title": title}}, headers=headers)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"] == "Title must be between 1 and 100 characters!"
+    response = client.post("/tasks/bulk/update", json={"ids": [1], "set": {"title": " "}}, headers=headers)
+    assert response.json()["detail"] == "Title must be between 1 and 100 characters!"
+    monkeypatch.setattr(bulk, "TASK_BULK_MAX_ITEMS", 2)
+    response = client.post("/tasks/bulk/complete", json={"ids": [1, 2, 3]}, headers=headers)
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+def test_export_user_tasks(client, token, monkeypatch):
+    """Tests streaming the user's tasks as NDJSON and CSV."""
+    monkeypatch.setattr(bulk, "TASK_EXPORT_BATCH_SIZE", 2)
+    headers = {"Authorization": f"Bearer {token}"}
+    tasks = [{"title": f"Task {i}", "description": 'with "quotes", commas\nand lines'} for i in range(5)]
+    client.post("/tasks/bulk", json=tasks, headers=headers)
+    client.post("/tasks/", json={"title": "Other"}, headers={"Authorization": f"Bearer {_other_user_token(client)}"})
+
+    response = client.get("/tasks/user/export", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["title"] for line in lines] == [f"Task {i}" for i in range(5)]
+    assert lines[0]["description"] == tasks[0]["description"]
+    assert lines[0]["status"] == "NEW"
+
+    response = client.get("/tasks/user/export?format=csv", headers=headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 5
+    assert rows[4]["description"] == tasks[4]["description"]
+    assert rows[4]["id"] == str(lines[4]["id"])
+
+
+def test_export_user_tasks_empty(client, token):
+    """Tests that an empty CSV export still has its header."""
+    response = client.get("/tasks/user/export?format=csv", headers={"Authorization": f"Bearer {token}"})
+    assert response.text.strip() == "id,title,description,status,user_id"
+    assert client.get("/tasks/user/export").status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_import_tasks_ndjson(client, token, monkeypatch):
+    """Tests a chunked NDJSON import that reports rejected lines."""
+    monkeypatch.setattr(bulk, "TASK_IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(bulk, "TASK_IMPORT_MAX_REJECTIONS", 1)
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+    lines = [json.dumps({"title": f"Task {i}"}) for i in range(5)]
+    lines[1] = "{broken"
+    lines.insert(3, json.dumps({"title": ""}))
+    response = client.post("/tasks/import", content="\n".join(lines).encode(), headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["imported"], data["rejected"]) == (4, 2)
+    assert data["rejected_lines"] == [
+        {"line": 2, "errors": [{"type": "json_invalid", "msg": data["rejected_lines"][0]["errors"][0]["msg"]}]}
+    ]
+    assert data["rows_per_second"] > 0
+    titles = [t["title"] for t in client.get("/tasks/user/", headers={"Authorization": f"Bearer {token}"}).json()["items"]]
+    assert titles == ["Task 0", "Task 2", "Task 3", "Task 4"]
+
+
+def test_import_commits_each_chunk(client, token, session, monkeypatch):
+    """Tests that an import commits chunk by chunk, not once at the end."""
+    monkeypatch.setattr(bulk, "TASK_IMPORT_CHUNK_SIZE", 2)
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+    body = "\n".join(json.dumps({"title": f"Task {i}"}) for i in range(5)).encode()
+    commits = []
+
+    def record(db):
+        commits.append(db)
+
+    event.listen(session, "after_commit", record)
+    try:
+        response = client.post("/tasks/import", content=body, headers=headers)
+    finally:
+        event.remove(session, "after_commit", record)
+    assert response.json()["imported"] == 5
+    assert len(commits) == 3
+    assert crud.verify_task_counters(session) == []
+
+
+def test_import_tasks_csv_round_trip(client, token, monkeypatch):
+    """Tests importing CSV, including an export of the user's own tasks."""
+    monkeypatch.setattr(bulk, "TASK_IMPORT_CHUNK_SIZE", 2)
+    headers = {"Authorization": f"Bearer {token}"}
+    body = (
+        'title,description,status,source\r\n'
+        'Plain,,NEW,x\r\n'
+        '"Multi","first line\r\nsecond, ""quoted"" line",IN_PROGRESS,x\r\n'
+        'Bad status,,DONE,x\r\n'
+        '\r\n'
+        'Last,done,COMPLETED,x'
+    )
+    response = client.post("/tasks/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    data = response.json()
+    assert (data["imported"], data["rejected"]) == (3, 1)
+    assert data["rejected_lines"][0]["line"] == 5
+    assert data["rejected_lines"][0]["errors"][0]["loc"] == ["status"]
+
+    exported = client.get("/tasks/user/export?format=csv", headers=headers).content
+    response = client.post("/tasks/import", content=exported, headers={**headers, "Content-Type": "text/csv"})
+    assert response.json()["imported"] == 3
+    items = client.get("/tasks/user/", headers=headers).json()["items"]
+    assert [(t["title"], t["description"], t["status"]) for t in items[3:]] == [
+        (t["title"], t["description"], t["status"]) for t in items[:3]
+    ]
+    assert items[1]["description"] == 'first line\nsecond, "quoted" line'
+    assert items[0]["description"] is None
+
+
+def test_import_tasks_rejects_unknown_formats(client, token):
+    """Tests the content type and CSV header checks of imports."""
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post("/tasks/import", json=[{"title": "t"}], headers=headers)
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    response = client.post("/tasks/import", content=b"name\nt\n", headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"] == "CSV header must include a title column!"
+
+
+def test_import_refuses_oversized_lines(client, token, monkeypatch):
+    """Tests that an import never buffers a line or CSV record past the limit."""
+    monkeypatch.setattr(bulk, "TASK_IMPORT_MAX_LINE_BYTES", 64)
+    headers = {"Authorization": f"Bearer {token}"}
+    body = json.dumps({"title": "ok"}) + "\n" + json.dumps({"title": "x" * 80})
+    response = client.post("/tasks/import", content=body.encode(), headers={**headers, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert response.json()["detail"] == "Line 2 exceeds the maximum of 64 bytes!"
+
+    body = "title\n" + '"unclosed\n' + "short line\n" * 10
+    response = client.post("/tasks/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert response.json()["detail"] == "Record on line 2 exceeds the maximum of 64 bytes!"
+
+
+def test_search_user_tasks(client, token):
+    """Tests ranked full-text search with cursor pagination."""
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/tasks/bulk", json=[
+        {"title": "Buy groceries", "description": "milk and bread"},
+        {"title": "Call plumber", "description": "kitchen sink leaking, buy new pipes"},
+        {"title": "Write report"},
+        {"title": "Buy concert tickets"},
+    ], headers=headers)
+    client.post("/tasks/", json={"title": "Buy a car"}, headers={"Authorization": f"Bearer {_other_user_token(client)}"})
+
+    response = client.get("/tasks/user/search?q=buy&limit=2", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    first = response.json()
+    assert first["has_more"] is True and first["total"] is None
+    # title matches rank above the description match
+    assert {t["title"] for t in first["items"]} == {"Buy groceries", "Buy concert tickets"}
+    second = client.get(
+        f"/tasks/user/search?q=buy&limit=2&cursor={first['next_cursor']}", headers=headers
+    ).json()
+    assert [t["title"] for t in second["items"]] == ["Call plumber"]
+    assert second["has_more"] is False
+
+    task_id = first["items"][0]["id"]
+    client.put(f"/tasks/{task_id}", json={"title": "Sell things"}, headers=headers)
+    titles = [t["title"] for t in client.get("/tasks/user/search?q=buy", headers=headers).json()["items"]]
+    assert "Sell things" not in titles and len(titles) == 2
+    assert client.get('/tasks/user/search?q="leaking" sink', headers=headers).json()["items"][0]["title"] == "Call plumber"
+
+
+def test_search_pages_through_tied_scores(client, token):
+    """Tests that results with equal scores are neither skipped nor repeated across pages."""
+    headers = {"Authorization": f"Bearer {token}"}
+    # description-only matches, whose score is not exact in single precision
+    ids = [r["id"] for r in client.post(
+        "/tasks/bulk", json=[{"title": f"Item {i}", "description": "buy it"} for i in range(7)], headers=headers
+    ).json()["results"]]
+    seen, cursor = [], None
+    while True:
+        url = "/tasks/user/search?q=buy&limit=2" + (f"&cursor={cursor}" if cursor else "")
+        page = client.get(url, headers=headers).json()
+        seen += [t["id"] for t in page["items"]]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+    assert seen == ids
+
+
+def test_search_user_tasks_validation(client, token):
+    """Tests empty queries and malformed cursors."""
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/tasks/user/search?q=%20", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Search query cannot be empty!"
+    response = client.get("/tasks/user/search?q=x&cursor=abc", headers=headers)
+    assert response.json()["detail"] == "Invalid cursor!"
+
+
+def test_user_task_stats(client, token):
+    """Tests per-status counts served from the counter rows."""
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/tasks/user/stats", headers=headers).json() == {
+        "by_status": {"NEW": 0, "IN_PROGRESS": 0, "COMPLETED": 0}, "total": 0
+    }
+    ids = [r["id"] for r in client.post(
+        "/tasks/bulk", json=[{"title": "a"}, {"title": "b"}, {"title": "c", "status": "IN_PROGRESS"}], headers=headers
+    ).json()["results"]]
+    client.patch(f"/tasks/{ids[0]}/complete", headers=headers)
+    client.delete(f"/tasks/{ids[1]}", headers=headers)
+    client.post("/tasks/", json={"title": "Other"}, headers={"Authorization": f"Bearer {_other_user_token(client)}"})
+
+    response = client.get("/tasks/user/stats", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"by_status": {"NEW": 0, "IN_PROGRESS": 1, "COMPLETED": 1}, "total": 2}
+
+
+def test_verify_and_rebuild_task_counters(client, token, session):
+    """Tests that counter drift is reported and repaired."""
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/tasks/bulk", json=[{"title": "a"}, {"title": "b"}], headers=headers)
+    assert crud.verify_task_counters(session) == []
+
+    session.query(models.TaskCounter).update({"task_count": 5})
+    session.commit()
+    drift = crud.verify_task_counters(session)
+    assert [(row["status"], row["counted"], row["actual"]) for row in drift] == [("NEW", 5, 2)]
+
+    crud.rebuild_task_counters(session)
+    assert crud.verify_task_counters(session) == []
+    assert client.get("/tasks/user/stats", headers=headers).json()["total"] == 2
+
+
+def test_read_tasks_with_fields(client, token, session, record_statements):
+    """Tests that `fields` trims tasks and selects only those columns."""
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(3):
+        client.post("/tasks/", json={"title": f"Sparse {i}", "description": "x" * 400}, headers=headers)
+    with record_statements() as statements:
+        response = client.get("/tasks/user/?fields=title,status&limit=2", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [set(item) for item in data["items"]] == [{"title", "status", "id"}] * 2
+    assert data["has_more"] is True and data["next_cursor"]
+    task_select = next(s for s in statements if "FROM tasks" in s and "tasks.title" in s)
+    assert "tasks.description" not in task_select
+
+    response = client.get(f"/tasks/?fields=title&cursor={data['next_cursor']}")
+    assert [set(item) for item in response.json()["items"]] == [{"title", "id"}] * len(response.json()["items"])
+
+    task_id = data["items"][0]["id"]
+    with record_statements() as statements:
+        response = client.get(f"/tasks/{task_id}?fields=status")
+    assert response.json() == {"status": "NEW", "id": task_id}
+    task_select = next(s for s in statements if "FROM tasks" in s)
+    assert "tasks.description" not in task_select and "tasks.title" not in task_select
+    response = client.get(f"/tasks/{task_id}?fields=description")
+    assert response.json() == {"description": "x" * 400, "id": task_id}
+    assert set(client.get(f"/tasks/{task_id}").json()) == {"title", "description", "status", "id", "user_id"}
+
+
+def test_read_tasks_with_unknown_fields(client, token):
+    """Tests that unknown `fields` are rejected."""
+    response = client.get("/tasks/?fields=title,password,owner")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Unknown fields: owner, password!"
+    assert client.get("/tasks/1?fields=secret").status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_fast_serialization_matches_response_models(client, token, session):
+    """Tests that the row serializers emit the bytes the response models would."""
+    headers = {"Authorization": f"Bearer {token}"}
+    for title, description in (
+        ("Plain", None),
+        ('Quotes "and" \\ slashes / </script>', "tab\tnew\nline\r\x01\x1f"),
+        ("Ünïcödé ✓ 漢字 🚀", "\u2028 line separator"),
+    ):
+        response = client.post("/tasks/", json={"title": title, "description": description, "status": "IN_PROGRESS"}, headers=headers)
+    user_id = response.json()["user_id"]
+
+    def expected(model, content):
+        return JSONResponse(jsonable_encoder(model.model_validate(content))).body
+
+    tasks, total, has_more = crud.get_user_tasks(session, user_id, limit=2)
+    rows, *_ = crud.get_user_tasks(session, user_id, limit=2, columns=serialization.TASK_COLUMNS)
+    body = serialization.page_response(_page(rows, total, has_more, 0, 2)).body
+    assert body == expected(schemas.PaginatedTasks, _page(tasks, total, has_more, 0, 2))
+    assert client.get("/tasks/user/?limit=2", headers=headers).content == body
+
+    for task in crud.get_user_tasks(session, user_id, limit=10)[0]:
+        row = crud.get_task(session, task.id, columns=serialization.TASK_COLUMNS)
+        body = serialization.task_response(row).body
+        assert body == expected(schemas.Task, task)
+        assert client.get(f"/tasks/{task.id}").content == body
+
+
+def test_task_etags_and_not_modified(client, token):
+    """Tests ETags on task reads, 304 answers and version bumps on writes."""
+    headers = {"Authorization": f"Bearer {token}"}
+    first = client.post("/tasks/", json={"title": "Old"}, headers=headers).json()["id"]
+    client.post("/tasks/", json={"title": "New"}, headers=headers)
+
+    response = client.get(f"/tasks/{first}")
+    etag = response.headers["ETag"]
+    assert etag == f'"{first}-1"'
+    response = client.get(f"/tasks/{first}", headers={"If-None-Match": f'W/{etag}, "x"'})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b"" and response.headers["ETag"] == etag
+    assert client.get(f"/tasks/{first}?fields=title", headers={"If-None-Match": etag}).status_code == 304
+
+    page = client.get("/tasks/user/", headers=headers)
+    page_etag = page.headers["ETag"]
+    assert client.get("/tasks/user/", headers={**headers, "If-None-Match": page_etag}).status_code == 304
+
+    # editing the older task changes the page even though the newest is untouched
+    response = client.put(f"/tasks/{first}", json={"title": "Edited"}, headers=headers)
+    assert response.headers["ETag"] == f'"{first}-2"'
+    response = client.get("/tasks/user/", headers={**headers, "If-None-Match": page_etag})
+    assert response.status_code == 200 and response.headers["ETag"] != page_etag
+    assert response.json()["items"][0]["title"] == "Edited"
+
+    client.post("/tasks/bulk/complete", json={"ids": [first]}, headers=headers)
+    assert client.get(f"/tasks/{first}").headers["ETag"] == f'"{first}-3"'
+
+
+def test_task_writes_honor_if_match(client, token):
+    """Tests that If-Match turns task writes into compare-and-swap (412 on mismatch)."""
+    headers = {"Authorization": f"Bearer {token}"}
+    task_id = client.post("/tasks/", json={"title": "Contended"}, headers=headers).json()["id"]
+    stale = client.get(f"/tasks/{task_id}").headers["ETag"]
+
+    response = client.put(f"/tasks/{task_id}", json={"title": "First"}, headers={**headers, "If-Match": stale})
+    assert response.status_code == 200
+    current = response.headers["ETag"]
+
+    for method, url, body in (
+        ("PUT", f"/tasks/{task_id}", {"title": "Second"}),
+        ("PATCH", f"/tasks/{task_id}/complete", None),
+        ("DELETE", f"/tasks/{task_id}", None),
+    ):
+        response = client.request(method, url, json=body, headers={**headers, "If-Match": stale})
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        assert response.json()["detail"] == "Task has been modified!"
+    assert client.put(f"/tasks/{task_id}", json={"title": "Other"}, headers={**headers, "If-Match": f'"{task_id + 1}-2"'}).status_code == 412
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "First"
+
+    response = client.patch(f"/tasks/{task_id}/complete", headers={**headers, "If-Match": current})
+    assert response.status_code == 200
+    assert client.put(f"/tasks/{task_id}", json={"title": "Any"}, headers={**headers, "If-Match": "*"}).status_code == 200
+    assert client.delete(f"/tasks/{task_id}", headers={**headers, "If-Match": f'"{task_id}-4"'}).status_code == 200
+    assert client.delete(f"/tasks/{task_id}", headers={**headers, "If-Match": "*"}).status_code == 404
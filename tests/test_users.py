@@ -1,6 +1,6 @@
 import pytest
 from fastapi import status
-from app import models
+from app import crud, models, passwords, auth
 
 
 def test_create_user(client):
@@ -153,4 +153,117 @@ def test_login_nonexistent_user(client):
         headers={"Content-Type": "application/x-www-form-urlencoded"},
     )
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
-    assert response.json()["detail"] == "Incorrect username or password!"
\ No newline at end of file
+    assert response.json()["detail"] == "Incorrect username or password!"
+
+def test_current_user_is_cached(client, token):
+    """Tests that repeated requests with one token reuse the cached user."""
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/tasks/user/", headers=headers).status_code == status.HTTP_200_OK
+    assert client.get("/tasks/user/", headers=headers).status_code == status.HTTP_200_OK
+    stats = client.get("/metrics").json()["user_cache"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["size"] == 1
+
+
+def test_deleted_user_token_stops_resolving(client, token):
+    """Tests that deleting a user evicts their cached token at once."""
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/tasks/user/", headers=headers).status_code == status.HTTP_200_OK
+    assert client.delete("/users/me", headers=headers).status_code == status.HTTP_200_OK
+    response = client.get("/tasks/user/", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Couldn't validate credentials!"
+
+
+def test_login_rejected_when_password_pool_saturated(client, test_user, monkeypatch):
+    """Tests that login fails fast with 503 once the password pool is full."""
+    monkeypatch.setattr(passwords.executor, "max_pending", 0)
+    response = client.post(
+        "/token",
+        data={"username": test_user["username"], "password": "sabuhi123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/metrics").json()["password_executor"]["rejected"] >= 1
+
+
+def test_password_executor_metrics(client, token):
+    """Tests that password work reports queue wait and hash time."""
+    stats = client.get("/metrics").json()["password_executor"]
+    assert stats["completed"] >= 1
+    assert stats["pending"] == 0
+    assert stats["hash_time_avg"] > 0
+
+
+def test_stateless_token_skips_database(client, test_user, session, monkeypatch):
+    """Tests that stateless tokens resolve the user from claims alone."""
+    monkeypatch.setattr(auth, "AUTH_STATELESS", True)
+    response = client.post(
+        "/token",
+        data={"username": test_user["username"], "password": "sabuhi123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    token = response.json()["access_token"]
+    session.query(models.User).filter(models.User.id == test_user["id"]).delete()
+    session.commit()
+    response = client.get("/tasks/user/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_stateless_token_revoked_on_user_delete(client, test_user, monkeypatch):
+    """Tests that deleting a user revokes their stateless tokens."""
+    monkeypatch.setattr(auth, "AUTH_STATELESS", True)
+    response = client.post(
+        "/token",
+        data={"username": test_user["username"], "password": "sabuhi123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/tasks/user/", headers=headers).status_code == status.HTTP_200_OK
+    assert client.delete("/users/me", headers=headers).status_code == status.HTTP_200_OK
+    response = client.get("/tasks/user/", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Couldn't validate credentials!"
+
+
+def test_delete_user_does_not_load_tasks(client, token, test_user, session, record_statements):
+    """Tests that account deletion leaves the tasks to the FK cascade."""
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/tasks/bulk", json=[{"title": f"Task {i}"} for i in range(3)], headers=headers)
+    with record_statements() as statements:
+        assert client.delete("/users/me", headers=headers).status_code == status.HTTP_200_OK
+
+    assert not any(s.startswith("SELECT") and "FROM tasks" in s for s in statements)
+    assert session.query(models.Task).count() == 0
+    assert session.query(models.TaskCounter).filter(models.TaskCounter.task_count != 0).count() == 0
+
+
+def test_delete_large_user_purges_in_background(client, token, test_user, session, monkeypatch, record_statements):
+    """Tests that large accounts are locked out and purged in batches."""
+    monkeypatch.setattr(crud, "USER_PURGE_THRESHOLD", 3)
+    monkeypatch.setattr(crud, "USER_PURGE_BATCH_SIZE", 2)
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/tasks/bulk", json=[{"title": f"Task {i}"} for i in range(5)], headers=headers)
+    with record_statements() as statements:
+        response = client.delete("/users/me", headers=headers)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert len([s for s in statements if s.startswith("DELETE FROM tasks")]) == 3
+    assert session.query(models.User).count() == 0
+    assert session.query(models.Task).count() == 0
+    assert session.query(models.TaskCounter).filter(models.TaskCounter.task_count != 0).count() == 0
+
+
+def test_deactivated_user_cannot_log_in(client, token, test_user, session):
+    """Tests that a user awaiting a background purge is locked out."""
+    crud.deactivate_user(session, test_user["id"])
+
+    response = client.get("/tasks/user/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    response = client.post("/token", data={"username": "testuser", "password": "sabuhi123"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    assert crud.purge_inactive_users(session) == [test_user["id"]]
+    assert session.query(models.User).count() == 0